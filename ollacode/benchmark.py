@@ -1,6 +1,6 @@
 """Ollama performance benchmark tool.
 
-Measures token generation speed, prefill speed, TTFT, and memory usage
+Measures token generation speed, prefill speed, TTFT/TBT, and memory usage
 across progressive requests to detect performance degradation.
 
 Supports reproducible workloads via fixed prompts, seed, and temperature=0.
@@ -8,20 +8,27 @@ Supports reproducible workloads via fixed prompts, seed, and temperature=0.
 
 from __future__ import annotations
 
+import asyncio
 import json
+import math
+import threading
 import time
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+from operator import attrgetter
 from pathlib import Path
 from typing import Optional
 
 import httpx
 import psutil
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
+from .engine import _estimate_tokens
+
 console = Console()
 
 
@@ -152,7 +159,7 @@ Format:
 """
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundResult:
     """Result metrics for a single benchmark round."""
     round_num: int
@@ -161,12 +168,31 @@ class RoundResult:
     gen_speed: float = 0.0        # tokens/sec (generation)
     prefill_speed: float = 0.0    # tokens/sec (prompt processing)
     ttft_ms: float = 0.0          # time to first token (ms)
+    tbt_p50_ms: float = 0.0       # time between tokens, median (ms)
+    tbt_p95_ms: float = 0.0       # time between tokens, 95th pct (ms)
     total_ms: float = 0.0         # total duration (ms)
     memory_mb: float = 0.0        # Ollama process RSS (MB)
+    truncated_pairs: int = 0      # history pairs dropped after this round
     error: str = ""
 
+    def to_dict(self) -> dict:
+        return {
+            "round_num": self.round_num,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "gen_speed": self.gen_speed,
+            "prefill_speed": self.prefill_speed,
+            "ttft_ms": self.ttft_ms,
+            "tbt_p50_ms": self.tbt_p50_ms,
+            "tbt_p95_ms": self.tbt_p95_ms,
+            "total_ms": self.total_ms,
+            "memory_mb": self.memory_mb,
+            "truncated_pairs": self.truncated_pairs,
+            "error": self.error,
+        }
 
-@dataclass
+
+@dataclass(slots=True)
 class BenchmarkReport:
     """Full benchmark report."""
     model: str
@@ -179,8 +205,17 @@ class BenchmarkReport:
     results: list[RoundResult] = field(default_factory=list)
 
     def to_dict(self) -> dict:
-        d = asdict(self)
-        return d
+        # Built by hand: asdict() deep-copies every RoundResult.
+        return {
+            "model": self.model,
+            "mode": self.mode,
+            "system_prompt_label": self.system_prompt_label,
+            "rounds": self.rounds,
+            "seed": self.seed,
+            "temperature": self.temperature,
+            "timestamp": self.timestamp,
+            "results": [r.to_dict() for r in self.results],
+        }
 
     @classmethod
     def from_dict(cls, d: dict) -> BenchmarkReport:
@@ -188,6 +223,81 @@ class BenchmarkReport:
         return cls(**d, results=results)
 
 
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+class _MemorySampler:
+    """Background thread tracking peak Ollama RSS, off the request path.
+
+    Handles are re-discovered every `refresh_every` samples so that
+    runner processes spawned on model load are picked up.
+    """
+
+    def __init__(
+        self, bench: OllamaBenchmark, interval: float = 0.1, refresh_every: int = 20
+    ) -> None:
+        self._bench = bench
+        self._interval = interval
+        self._refresh_every = refresh_every
+        self._peak = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="ollacode-mem-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        ticks = 0
+        while not self._stop.wait(self._interval):
+            ticks += 1
+            if ticks % self._refresh_every == 0:
+                self._bench._refresh_procs()
+            mb = self._bench._get_ollama_memory_mb()
+            with self._lock:
+                if mb > self._peak:
+                    self._peak = mb
+
+    def take_peak(self) -> float:
+        """Return the peak seen since the previous call and reset it."""
+        with self._lock:
+            peak, self._peak = self._peak, 0.0
+        return peak
+
+
+class _ChatStream:
+    """Accumulates a streamed /api/chat response and its chunk timings."""
+
+    def __init__(self, start_ns: int) -> None:
+        self.start_ns = start_ns
+        self.parts: list[str] = []
+        self.arrivals_ns: list[int] = []
+        self.final: dict = {}
+
+    def feed(self, line: str) -> None:
+        if not line.strip():
+            return
+        chunk = json.loads(line)
+        if "error" in chunk:
+            raise RuntimeError(chunk["error"])
+
+        content = chunk.get("message", {}).get("content", "")
+        if content:
+            self.arrivals_ns.append(time.perf_counter_ns() - self.start_ns)
+            self.parts.append(content)
+
+        if chunk.get("done"):
+            chunk["message"] = {"role": "assistant", "content": "".join(self.parts)}
+            self.final = chunk
+
+
 class OllamaBenchmark:
     """Ollama performance benchmark runner."""
 
@@ -197,60 +307,154 @@ class OllamaBenchmark:
         model: str = "qwen3-coder:30b",
         seed: int = 42,
         temperature: float = 0.0,
+        keep_alive: str = "30m",
+        sample_memory: bool = True,
     ) -> None:
         self.host = host
         self.model = model
         self.seed = seed
         self.temperature = temperature
+        # Keep the model resident between rounds so idle gaps don't unload it
+        self.keep_alive = keep_alive
+        self.sample_memory = sample_memory
+        # Everything but the messages is fixed for the run: encode it once,
+        # minus the closing brace, and splice the messages in per request
+        self._payload_prefix = json.dumps(
+            {
+                "model": model,
+                "stream": True,
+                "keep_alive": keep_alive,
+                "options": {"temperature": temperature, "seed": seed},
+            },
+            separators=(",", ":"),
+        ).encode()[:-1]
+        # Limits live on the transport: httpx ignores Client(limits=...)
+        # once an explicit transport is supplied.
         self._client = httpx.Client(
             base_url=host,
             timeout=httpx.Timeout(connect=10.0, read=600.0, write=10.0, pool=10.0),
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(
+                    max_keepalive_connections=16,
+                    max_connections=32,
+                    keepalive_expiry=30.0,
+                ),
+            ),
         )
 
+        self._ollama_procs: list[psutil.Process] = []
+        # Left unstarted when disabled: take_peak() then always reports 0.0
+        self._sampler = _MemorySampler(self)
+        if sample_memory:
+            self._refresh_procs()
+            self._sampler.start()
+
     def close(self) -> None:
+        self._sampler.stop()
         self._client.close()
 
-    def _get_ollama_memory_mb(self) -> float:
-        """Get RSS memory of all ollama-related processes in MB."""
-        total_rss = 0.0
+    def _refresh_procs(self) -> None:
+        """Discover ollama-related processes and cache their handles."""
+        procs: list[psutil.Process] = []
         for proc in psutil.process_iter(["name", "cmdline"]):
             try:
                 name = (proc.info.get("name") or "").lower()
                 cmdline = " ".join(proc.info.get("cmdline") or []).lower()
                 if "ollama" in name or "ollama" in cmdline:
-                    mem = proc.memory_info()
-                    total_rss += mem.rss
+                    procs.append(proc)
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
+        self._ollama_procs = procs
+
+    def _get_ollama_memory_mb(self) -> float:
+        """Get RSS memory of all ollama-related processes in MB."""
+        if not self.sample_memory:
+            return 0.0
+        total_rss = 0
+        stale = False
+        for proc in self._ollama_procs:
+            try:
+                total_rss += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                stale = True
+        if stale:
+            self._refresh_procs()
         return total_rss / (1024 * 1024)
 
+    def _encode_payload(self, messages: list[dict[str, str]]) -> bytes:
+        """Build the /api/chat request body from the pre-encoded prefix."""
+        return b"".join((
+            self._payload_prefix,
+            b',"messages":',
+            json.dumps(messages, separators=(",", ":")).encode(),
+            b"}",
+        ))
+
     def _send_request(
         self, messages: list[dict[str, str]]
-    ) -> tuple[dict, float]:
-        """Send a non-streaming chat request and return metrics.
+    ) -> tuple[dict, float, list[int]]:
+        """Send a streaming chat request and return metrics.
 
-        Returns (response_data, wall_clock_ms).
+        Returns (final_chunk, wall_clock_ms, chunk_arrivals_ns). The final
+        chunk carries Ollama's counters, with the full streamed text as its
+        message content; chunk_arrivals_ns holds the client-side arrival
+        time of every content chunk relative to the request start.
         """
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False,
-            "options": {
-                "temperature": self.temperature,
-                "seed": self.seed,
-            },
-        }
-
-        start = time.perf_counter()
-        resp = self._client.post("/api/chat", json=payload)
-        wall_ms = (time.perf_counter() - start) * 1000
-        resp.raise_for_status()
-        return resp.json(), wall_ms
+        body = self._encode_payload(messages)
+
+        start_ns = time.perf_counter_ns()
+        stream = _ChatStream(start_ns)
+        with self._client.stream("POST", "/api/chat", content=body, headers=_JSON_HEADERS) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                stream.feed(line)
+        wall_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        return stream.final, wall_ms, stream.arrivals_ns
+
+    async def _send_request_async(
+        self, client: httpx.AsyncClient, messages: list[dict[str, str]]
+    ) -> tuple[dict, float, list[int]]:
+        """Async variant of `_send_request` for concurrent rounds."""
+        body = self._encode_payload(messages)
+
+        start_ns = time.perf_counter_ns()
+        stream = _ChatStream(start_ns)
+        async with client.stream("POST", "/api/chat", content=body, headers=_JSON_HEADERS) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                stream.feed(line)
+        wall_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        return stream.final, wall_ms, stream.arrivals_ns
+
+    def _warmup(self, system_prompt: str, count: int) -> None:
+        """Send unrecorded requests so model load time stays out of round 1."""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": "hi"},
+        ]
+        for n in range(count):
+            with console.status(f"[dim]Warmup {n+1}/{count}...[/dim]"):
+                try:
+                    self._send_request(messages)
+                except Exception as e:
+                    console.print(f"[yellow]⚠️ Warmup failed: {e}[/yellow]")
+                    return
 
     def _extract_metrics(
-        self, data: dict, wall_ms: float, memory_mb: float, round_num: int
+        self,
+        data: dict,
+        wall_ms: float,
+        memory_mb: float,
+        round_num: int,
+        arrivals_ns: list[int] | None = None,
     ) -> RoundResult:
-        """Extract metrics from Ollama API response."""
+        """Extract metrics from Ollama API response.
+
+        TTFT and TBT come from client-side chunk arrival times when
+        available; otherwise TTFT falls back to the server's prefill time.
+        """
         eval_count = data.get("eval_count", 0)
         eval_duration = data.get("eval_duration", 1)  # nanoseconds
         prompt_eval_count = data.get("prompt_eval_count", 0)
@@ -263,32 +467,77 @@ class OllamaBenchmark:
             if prompt_eval_duration > 0
             else 0
         )
-        ttft_ms = prompt_eval_duration / 1e6  # ns -> ms
+        # Timings stay integer nanoseconds until converted here, once.
+        arrivals_ns = arrivals_ns or []
+        if arrivals_ns:
+            ttft_ms = arrivals_ns[0] / 1e6
+        else:
+            ttft_ms = prompt_eval_duration / 1e6  # ns -> ms
+        tbts_ns = sorted(b - a for a, b in zip(arrivals_ns, arrivals_ns[1:]))
 
         return RoundResult(
             round_num=round_num,
             prompt_tokens=prompt_eval_count,
             output_tokens=eval_count,
-            gen_speed=round(gen_speed, 2),
-            prefill_speed=round(prefill_speed, 2),
-            ttft_ms=round(ttft_ms, 1),
-            total_ms=round(total_duration / 1e6, 1),
-            memory_mb=round(memory_mb, 1),
+            gen_speed=gen_speed,
+            prefill_speed=prefill_speed,
+            ttft_ms=ttft_ms,
+            tbt_p50_ms=_percentile(tbts_ns, 50) / 1e6,
+            tbt_p95_ms=_percentile(tbts_ns, 95) / 1e6,
+            total_ms=total_duration / 1e6,
+            memory_mb=memory_mb,
         )
 
+    @staticmethod
+    def _make_table(show_memory: bool = True) -> Table:
+        """Create the per-round results table."""
+        table = Table(show_header=True, header_style="bold cyan")
+        table.add_column("Round", justify="center", width=6)
+        table.add_column("In Tok", justify="right", width=8)
+        table.add_column("Out Tok", justify="right", width=8)
+        table.add_column("Gen t/s", justify="right", width=9)
+        table.add_column("Prefill t/s", justify="right", width=11)
+        table.add_column("TTFT(ms)", justify="right", width=9)
+        table.add_column("Total(ms)", justify="right", width=10)
+        if show_memory:
+            table.add_column("Mem(MB)", justify="right", width=9)
+        return table
+
+    @staticmethod
+    def _add_round_row(table: Table, result: RoundResult, show_memory: bool = True) -> None:
+        """Append one successful round to the results table."""
+        speed_color = "green" if result.gen_speed > 50 else "yellow" if result.gen_speed > 20 else "red"
+        cells = [
+            str(result.round_num),
+            str(result.prompt_tokens),
+            str(result.output_tokens),
+            f"[{speed_color}]{result.gen_speed:.1f}[/{speed_color}]",
+            f"{result.prefill_speed:.1f}",
+            f"{result.ttft_ms:.0f}",
+            f"{result.total_ms:.0f}",
+        ]
+        if show_memory:
+            cells.append(f"{result.memory_mb:.0f}")
+        table.add_row(*cells)
+
     def run_context_growth(
         self,
         prompts: list[str] | None = None,
         rounds: int = 20,
         system_prompt: str = ENGLISH_SYSTEM_PROMPT,
         system_prompt_label: str = "english",
+        warmup: int = 1,
+        max_context_tokens: int | None = None,
     ) -> BenchmarkReport:
-        """Run context growth benchmark — history accumulates."""
-        prompts = (prompts or DEFAULT_PROMPTS)[:rounds]
-        if len(prompts) < rounds:
-            # Cycle prompts if not enough
-            while len(prompts) < rounds:
-                prompts.append(prompts[len(prompts) % len(DEFAULT_PROMPTS)])
+        """Run context growth benchmark — history accumulates.
+
+        With `max_context_tokens` set, the oldest user/assistant pairs are
+        dropped once the estimated history size exceeds it, so rounds keep
+        fitting the server's context window.
+        """
+        # Cycle prompts if not enough; never mutate the caller's list
+        base = list(prompts) if prompts else DEFAULT_PROMPTS
+        prompts = [base[i % len(base)] for i in range(rounds)]
 
         report = BenchmarkReport(
             model=self.model,
@@ -303,11 +552,100 @@ class OllamaBenchmark:
         messages: list[dict[str, str]] = [
             {"role": "system", "content": system_prompt},
         ]
+        # Running estimate, adjusted as messages are added and dropped
+        history_tokens = _estimate_tokens(system_prompt)
+        cap = f" | Context cap: {max_context_tokens} tok" if max_context_tokens else ""
 
         console.print(
             Panel(
                 f"[bold]Model:[/bold] {self.model}\n"
                 f"[bold]Mode:[/bold] context-growth\n"
+                f"[bold]Rounds:[/bold] {rounds}{cap}\n"
+                f"[bold]Seed:[/bold] {self.seed} | Temp: {self.temperature}\n"
+                f"[bold]Prompt:[/bold] {system_prompt_label}",
+                title="[bold magenta]🏋️ Ollama Benchmark[/bold magenta]",
+                border_style="magenta",
+            )
+        )
+
+        self._warmup(system_prompt, warmup)
+        table = self._make_table(self.sample_memory)
+
+        # Live redraws the table at a fixed rate from its own thread, so
+        # the loop only appends rows instead of printing per round.
+        with Live(table, console=console, refresh_per_second=10) as live:
+            for i in range(rounds):
+                prompt = prompts[i]
+                messages.append({"role": "user", "content": prompt})
+                history_tokens += _estimate_tokens(prompt)
+                table.caption = f"Round {i+1}/{rounds}..."
+
+                try:
+                    self._sampler.take_peak()  # discard the idle gap before this round
+                    data, wall_ms, arrivals = self._send_request(messages)
+                    memory = self._sampler.take_peak() or self._get_ollama_memory_mb()
+
+                    # Add assistant response to history for next round
+                    assistant_content = data.get("message", {}).get("content", "")
+                    messages.append({"role": "assistant", "content": assistant_content})
+                    history_tokens += _estimate_tokens(assistant_content)
+
+                    result = self._extract_metrics(data, wall_ms, memory, i + 1, arrivals)
+
+                    # Drop oldest pairs (after the system prompt) while over the cap
+                    if max_context_tokens:
+                        while history_tokens > max_context_tokens and len(messages) > 3:
+                            for old in messages[1:3]:
+                                history_tokens -= _estimate_tokens(old["content"])
+                            del messages[1:3]
+                            result.truncated_pairs += 1
+
+                    report.results.append(result)
+                    self._add_round_row(table, result, self.sample_memory)
+
+                except Exception as e:
+                    error_result = RoundResult(round_num=i + 1, error=str(e))
+                    report.results.append(error_result)
+                    live.console.print(f"  [dim]Round {i+1}/{rounds}[/dim] [red]✗ {e}[/red]")
+                    # Remove failed user message from history
+                    history_tokens -= _estimate_tokens(messages.pop()["content"])
+
+            table.caption = None
+
+        console.print()
+        self._print_summary(report)
+        return report
+
+    def run_sustained(
+        self,
+        prompt: str | None = None,
+        rounds: int = 20,
+        prompts: list[str] | None = None,
+        system_prompt: str = ENGLISH_SYSTEM_PROMPT,
+        system_prompt_label: str = "english",
+        warmup: int = 1,
+    ) -> BenchmarkReport:
+        """Run sustained load benchmark — independent requests.
+
+        Given `prompts`, round i uses prompts[i % len(prompts)], as in
+        run_sustained_async().
+        """
+        prompt = prompt or SUSTAINED_PROMPT
+
+        report = BenchmarkReport(
+            model=self.model,
+            mode="sustained",
+            system_prompt_label=system_prompt_label,
+            rounds=rounds,
+            seed=self.seed,
+            temperature=self.temperature,
+            timestamp=datetime.now().isoformat(),
+        )
+
+        console.print(
+            Panel(
+                f"[bold]Model:[/bold] {self.model}\n"
+                f"[bold]Mode:[/bold] sustained\n"
                 f"[bold]Rounds:[/bold] {rounds}\n"
                 f"[bold]Seed:[/bold] {self.seed} | Temp: {self.temperature}\n"
                 f"[bold]Prompt:[/bold] {system_prompt_label}",
@@ -316,69 +654,60 @@ class OllamaBenchmark:
             )
         )
 
-        table = Table(show_header=True, header_style="bold cyan")
-        table.add_column("Round", justify="center", width=6)
-        table.add_column("In Tok", justify="right", width=8)
-        table.add_column("Out Tok", justify="right", width=8)
-        table.add_column("Gen t/s", justify="right", width=9)
-        table.add_column("Prefill t/s", justify="right", width=11)
-        table.add_column("TTFT(ms)", justify="right", width=9)
-        table.add_column("Total(ms)", justify="right", width=10)
-        table.add_column("Mem(MB)", justify="right", width=9)
+        self._warmup(system_prompt, warmup)
+        table = self._make_table(self.sample_memory)
 
-        for i in range(rounds):
-            prompt = prompts[i]
-            messages.append({"role": "user", "content": prompt})
+        with Live(table, console=console, refresh_per_second=10) as live:
+            for i in range(rounds):
+                # Fresh messages each round
+                messages = [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompts[i % len(prompts)] if prompts else prompt},
+                ]
+                table.caption = f"Round {i+1}/{rounds}..."
 
-            console.print(f"  [dim]Round {i+1}/{rounds}...[/dim]", end=" ")
+                try:
+                    self._sampler.take_peak()  # discard the idle gap before this round
+                    data, wall_ms, arrivals = self._send_request(messages)
+                    memory = self._sampler.take_peak() or self._get_ollama_memory_mb()
 
-            try:
-                mem_before = self._get_ollama_memory_mb()
-                data, wall_ms = self._send_request(messages)
-                mem_after = self._get_ollama_memory_mb()
-                memory = max(mem_before, mem_after)
-
-                # Add assistant response to history for next round
-                assistant_content = data.get("message", {}).get("content", "")
-                messages.append({"role": "assistant", "content": assistant_content})
-
-                result = self._extract_metrics(data, wall_ms, memory, i + 1)
-                report.results.append(result)
-
-                speed_color = "green" if result.gen_speed > 50 else "yellow" if result.gen_speed > 20 else "red"
-                table.add_row(
-                    str(i + 1),
-                    str(result.prompt_tokens),
-                    str(result.output_tokens),
-                    f"[{speed_color}]{result.gen_speed:.1f}[/{speed_color}]",
-                    f"{result.prefill_speed:.1f}",
-                    f"{result.ttft_ms:.0f}",
-                    f"{result.total_ms:.0f}",
-                    f"{result.memory_mb:.0f}",
-                )
-                console.print(f"[green]✓[/green] {result.gen_speed:.1f} t/s")
+                    result = self._extract_metrics(data, wall_ms, memory, i + 1, arrivals)
+                    report.results.append(result)
+                    self._add_round_row(table, result, self.sample_memory)
 
-            except Exception as e:
-                error_result = RoundResult(round_num=i + 1, error=str(e))
-                report.results.append(error_result)
-                console.print(f"[red]✗ {e}[/red]")
-                # Remove failed user message from history
-                messages.pop()
+                except Exception as e:
+                    error_result = RoundResult(round_num=i + 1, error=str(e))
+                    report.results.append(error_result)
+                    live.console.print(f"  [dim]Round {i+1}/{rounds}[/dim] [red]✗ {e}[/red]")
+
+            table.caption = None
 
         console.print()
-        console.print(table)
         self._print_summary(report)
         return report
 
-    def run_sustained(
+    async def run_sustained_async(
         self,
         prompt: str | None = None,
         rounds: int = 20,
+        prompts: list[str] | None = None,
+        concurrency: int = 4,
+        batch_size: int = 1,
         system_prompt: str = ENGLISH_SYSTEM_PROMPT,
         system_prompt_label: str = "english",
+        warmup: int = 1,
     ) -> BenchmarkReport:
-        """Run sustained load benchmark — independent requests."""
+        """Run sustained load benchmark with up to `concurrency` rounds in flight.
+
+        Rounds are independent, so they can overlap on the server
+        (Ollama serves them in parallel up to OLLAMA_NUM_PARALLEL).
+        With `batch_size` > 1 each round fires that many identical requests
+        together and records their averaged metrics. Given `prompts`, round i
+        uses prompts[i % len(prompts)] and rounds are dispatched in buckets of
+        similar prompt length so short prompts don't wait on long ones.
+        """
         prompt = prompt or SUSTAINED_PROMPT
+        round_prompts = [prompts[i % len(prompts)] for i in range(rounds)] if prompts else None
 
         report = BenchmarkReport(
             model=self.model,
@@ -394,7 +723,7 @@ class OllamaBenchmark:
             Panel(
                 f"[bold]Model:[/bold] {self.model}\n"
                 f"[bold]Mode:[/bold] sustained\n"
-                f"[bold]Rounds:[/bold] {rounds}\n"
+                f"[bold]Rounds:[/bold] {rounds} | Concurrency: {concurrency} | Batch: {batch_size}\n"
                 f"[bold]Seed:[/bold] {self.seed} | Temp: {self.temperature}\n"
                 f"[bold]Prompt:[/bold] {system_prompt_label}",
                 title="[bold magenta]🏋️ Ollama Benchmark[/bold magenta]",
@@ -402,76 +731,109 @@ class OllamaBenchmark:
             )
         )
 
-        table = Table(show_header=True, header_style="bold cyan")
-        table.add_column("Round", justify="center", width=6)
-        table.add_column("In Tok", justify="right", width=8)
-        table.add_column("Out Tok", justify="right", width=8)
-        table.add_column("Gen t/s", justify="right", width=9)
-        table.add_column("Prefill t/s", justify="right", width=11)
-        table.add_column("TTFT(ms)", justify="right", width=9)
-        table.add_column("Total(ms)", justify="right", width=10)
-        table.add_column("Mem(MB)", justify="right", width=9)
-
-        for i in range(rounds):
-            # Fresh messages each round
-            messages = [
+        # Identical for every round and never mutated, so share one list
+        # per distinct prompt
+        conversations = {
+            p: [
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
+                {"role": "user", "content": p},
             ]
-
-            console.print(f"  [dim]Round {i+1}/{rounds}...[/dim]", end=" ")
-
-            try:
-                mem_before = self._get_ollama_memory_mb()
-                data, wall_ms = self._send_request(messages)
-                mem_after = self._get_ollama_memory_mb()
-                memory = max(mem_before, mem_after)
-
-                result = self._extract_metrics(data, wall_ms, memory, i + 1)
-                report.results.append(result)
-
-                speed_color = "green" if result.gen_speed > 50 else "yellow" if result.gen_speed > 20 else "red"
-                table.add_row(
-                    str(i + 1),
-                    str(result.prompt_tokens),
-                    str(result.output_tokens),
-                    f"[{speed_color}]{result.gen_speed:.1f}[/{speed_color}]",
-                    f"{result.prefill_speed:.1f}",
-                    f"{result.ttft_ms:.0f}",
-                    f"{result.total_ms:.0f}",
-                    f"{result.memory_mb:.0f}",
+            for p in (round_prompts or [prompt])
+        }
+        sem = asyncio.Semaphore(concurrency)
+        table = self._make_table(self.sample_memory)
+        done = 0
+
+        async def _one_round(i: int) -> RoundResult:
+            nonlocal done
+            messages = conversations[round_prompts[i] if round_prompts else prompt]
+            async with sem:
+                replies = await asyncio.gather(*(
+                    self._send_request_async(client, messages)
+                    for _ in range(batch_size)
+                ))
+            # Peak since the previous round finished; rounds overlap here
+            memory = self._sampler.take_peak() or await asyncio.to_thread(
+                self._get_ollama_memory_mb
+            )
+            result = _average_results([
+                self._extract_metrics(data, wall_ms, memory, i + 1, arrivals)
+                for data, wall_ms, arrivals in replies
+            ])
+            # Rows land in completion order; the report keeps round order
+            done += 1
+            table.caption = f"{done}/{rounds} rounds done..."
+            self._add_round_row(table, result, self.sample_memory)
+            return result
+
+        await asyncio.to_thread(self._warmup, system_prompt, warmup)
+        with Live(table, console=console, refresh_per_second=10) as live:
+            async with httpx.AsyncClient(
+                base_url=self.host,
+                http2=True,
+                timeout=httpx.Timeout(connect=10.0, read=600.0, write=10.0, pool=600.0),
+                limits=httpx.Limits(
+                    max_keepalive_connections=concurrency * batch_size,
+                    max_connections=concurrency * batch_size * 2,
+                    keepalive_expiry=30.0,
+                ),
+            ) as client:
+                # The semaphore admits tasks in creation order, so creating
+                # them bucket by bucket keeps similar lengths in flight together
+                if round_prompts:
+                    order = [i for bucket in _bucket_prompts(round_prompts, concurrency) for i in bucket]
+                else:
+                    order = range(rounds)
+                tasks = {i: asyncio.create_task(_one_round(i)) for i in order}
+                outcomes = await asyncio.gather(
+                    *(tasks[i] for i in range(rounds)), return_exceptions=True
                 )
-                console.print(f"[green]✓[/green] {result.gen_speed:.1f} t/s")
 
-            except Exception as e:
-                error_result = RoundResult(round_num=i + 1, error=str(e))
-                report.results.append(error_result)
-                console.print(f"[red]✗ {e}[/red]")
+            for i, outcome in enumerate(outcomes):
+                if isinstance(outcome, BaseException):
+                    report.results.append(RoundResult(round_num=i + 1, error=str(outcome)))
+                    live.console.print(f"  [dim]Round {i+1}/{rounds}[/dim] [red]✗ {outcome}[/red]")
+                else:
+                    report.results.append(outcome)
+
+            table.caption = None
 
         console.print()
-        console.print(table)
         self._print_summary(report)
         return report
 
     def _print_summary(self, report: BenchmarkReport) -> None:
         """Print summary statistics."""
-        valid = [r for r in report.results if not r.error]
-        if not valid:
+        # Single pass over the results fills every series
+        speeds: list[float] = []
+        mems: list[float] = []
+        ttft_sum = tbt_p50_sum = tbt_p95_sum = 0.0
+        first = last = None
+        for r in report.results:
+            if r.error:
+                continue
+            if first is None:
+                first = r
+            last = r
+            speeds.append(r.gen_speed)
+            ttft_sum += r.ttft_ms
+            tbt_p50_sum += r.tbt_p50_ms
+            tbt_p95_sum += r.tbt_p95_ms
+            if r.memory_mb > 0:
+                mems.append(r.memory_mb)
+
+        if first is None:
             console.print("[red]No successful rounds.[/red]")
             return
 
-        first = valid[0]
-        last = valid[-1]
-
-        speeds = [r.gen_speed for r in valid]
-        avg_speed = sum(speeds) / len(speeds)
+        n = len(speeds)
+        avg_speed = sum(speeds) / n
         min_speed = min(speeds)
         max_speed = max(speeds)
+        avg_ttft = ttft_sum / n
+        avg_tbt_p50 = tbt_p50_sum / n
+        avg_tbt_p95 = tbt_p95_sum / n
 
-        ttfts = [r.ttft_ms for r in valid]
-        avg_ttft = sum(ttfts) / len(ttfts)
-
-        mems = [r.memory_mb for r in valid if r.memory_mb > 0]
         mem_start = mems[0] if mems else 0
         mem_end = mems[-1] if mems else 0
 
@@ -483,6 +845,11 @@ class OllamaBenchmark:
         speed_color = "red" if speed_change < -10 else "green" if speed_change > -5 else "yellow"
 
         mem_change = mem_end - mem_start
+        # No line at all when memory sampling was off
+        mem_line = (
+            f"[bold]Memory:[/bold] {mem_start:.0f} → {mem_end:.0f} MB ({'+' if mem_change >= 0 else ''}{mem_change:.0f} MB)\n"
+            if mems else ""
+        )
 
         console.print(
             Panel(
@@ -490,7 +857,8 @@ class OllamaBenchmark:
                 f"[{speed_color}]({speed_icon}{abs(speed_change):.1f}%)[/{speed_color}]\n"
                 f"[bold]  Avg/Min/Max:[/bold] {avg_speed:.1f} / {min_speed:.1f} / {max_speed:.1f} t/s\n"
                 f"[bold]TTFT:[/bold] {first.ttft_ms:.0f} → {last.ttft_ms:.0f} ms (avg: {avg_ttft:.0f} ms)\n"
-                f"[bold]Memory:[/bold] {mem_start:.0f} → {mem_end:.0f} MB ({'+' if mem_change >= 0 else ''}{mem_change:.0f} MB)\n"
+                f"[bold]TBT p50/p95:[/bold] {avg_tbt_p50:.1f} / {avg_tbt_p95:.1f} ms (avg)\n"
+                f"{mem_line}"
                 f"[bold]Sparkline:[/bold] {sparkline}",
                 title=f"[bold cyan]📊 Summary — {report.system_prompt_label}[/bold cyan]",
                 border_style="cyan",
@@ -500,10 +868,10 @@ class OllamaBenchmark:
     @staticmethod
     def save_report(report: BenchmarkReport, path: str) -> None:
         """Save benchmark report to JSON."""
-        Path(path).write_text(
-            json.dumps(report.to_dict(), indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        # json.dump writes in chunks, so the full JSON text never sits
+        # in memory alongside its encoded copy.
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
         console.print(f"[success]💾 Results saved to {path}[/success]")
 
     @staticmethod
@@ -515,17 +883,28 @@ class OllamaBenchmark:
     @staticmethod
     def compare_reports(report_a: BenchmarkReport, report_b: BenchmarkReport) -> None:
         """Compare two benchmark reports side by side."""
-        valid_a = [r for r in report_a.results if not r.error]
-        valid_b = [r for r in report_b.results if not r.error]
-
-        if not valid_a or not valid_b:
+        def _stats(results: list[RoundResult]) -> tuple[dict[str, float], list[float]]:
+            """Averages, peak memory and the speed series from per-metric columns."""
+            rows = [_COMPARE_METRICS(r) for r in results if not r.error]
+            if not rows:
+                return {}, []
+            # Transpose to one tuple per metric; sum/max then run in C
+            speeds, ttfts, prefills, mems = zip(*rows)
+            n = len(rows)
+            return {
+                "gen_speed": sum(speeds) / n,
+                "ttft_ms": sum(ttfts) / n,
+                "prefill_speed": sum(prefills) / n,
+                "peak_memory_mb": max(mems),
+            }, list(speeds)
+
+        stats_a, speeds_a = _stats(report_a.results)
+        stats_b, speeds_b = _stats(report_b.results)
+
+        if not speeds_a or not speeds_b:
             console.print("[red]Cannot compare — one or both reports have no data.[/red]")
             return
 
-        def _avg(items: list[RoundResult], key: str) -> float:
-            vals = [getattr(r, key) for r in items]
-            return sum(vals) / len(vals) if vals else 0
-
         def _fmt_change(before: float, after: float, lower_is_better: bool = False) -> str:
             if before == 0:
                 return "N/A"
@@ -537,17 +916,14 @@ class OllamaBenchmark:
             sign = "+" if change > 0 else ""
             return f"{sign}{change:.1f}% {icon}"
 
-        avg_speed_a = _avg(valid_a, "gen_speed")
-        avg_speed_b = _avg(valid_b, "gen_speed")
-        avg_ttft_a = _avg(valid_a, "ttft_ms")
-        avg_ttft_b = _avg(valid_b, "ttft_ms")
-        avg_prefill_a = _avg(valid_a, "prefill_speed")
-        avg_prefill_b = _avg(valid_b, "prefill_speed")
-
-        mems_a = [r.memory_mb for r in valid_a if r.memory_mb > 0]
-        mems_b = [r.memory_mb for r in valid_b if r.memory_mb > 0]
-        peak_mem_a = max(mems_a) if mems_a else 0
-        peak_mem_b = max(mems_b) if mems_b else 0
+        avg_speed_a = stats_a["gen_speed"]
+        avg_speed_b = stats_b["gen_speed"]
+        avg_ttft_a = stats_a["ttft_ms"]
+        avg_ttft_b = stats_b["ttft_ms"]
+        avg_prefill_a = stats_a["prefill_speed"]
+        avg_prefill_b = stats_b["prefill_speed"]
+        peak_mem_a = stats_a["peak_memory_mb"]
+        peak_mem_b = stats_b["peak_memory_mb"]
 
         label_a = report_a.system_prompt_label or "A"
         label_b = report_b.system_prompt_label or "B"
@@ -588,8 +964,8 @@ class OllamaBenchmark:
         )
 
         # Sparklines
-        sparkline_a = _make_sparkline([r.gen_speed for r in valid_a])
-        sparkline_b = _make_sparkline([r.gen_speed for r in valid_b])
+        sparkline_a = _make_sparkline(speeds_a)
+        sparkline_b = _make_sparkline(speeds_b)
 
         console.print()
         console.print(table)
@@ -598,17 +974,66 @@ class OllamaBenchmark:
         console.print()
 
 
+# Columns pulled out of each round by compare_reports
+_COMPARE_METRICS = attrgetter("gen_speed", "ttft_ms", "prefill_speed", "memory_mb")
+
+
+def _bucket_prompts(prompts: list[str], k: int) -> list[list[int]]:
+    """Group prompt indices into runs of `k`, shortest prompts first."""
+    order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+    return [order[i:i + k] for i in range(0, len(order), k)]
+
+
+def _percentile(ordered: list[int], pct: float) -> int:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0
+    k = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def _average_results(results: list[RoundResult]) -> RoundResult:
+    """Average the numeric metrics of requests that make up one round."""
+    if len(results) == 1:
+        return results[0]
+    n = len(results)
+    merged = RoundResult(round_num=results[0].round_num)
+    for f in fields(RoundResult):
+        if f.name in ("round_num", "error"):
+            continue
+        total = sum(getattr(r, f.name) for r in results)
+        setattr(merged, f.name, total // n if isinstance(total, int) else total / n)
+    return merged
+
+
+_SPARK_BLOCKS = " ▁▂▃▄▅▆▇█"
+
+
 def _make_sparkline(values: list[float]) -> str:
     """Create a sparkline string from values."""
     if not values:
         return ""
-    blocks = " ▁▂▃▄▅▆▇█"
+    blocks = _SPARK_BLOCKS
     mn, mx = min(values), max(values)
-    rng = mx - mn if mx != mn else 1
-    return "".join(
-        blocks[min(len(blocks) - 1, int((v - mn) / rng * (len(blocks) - 1)))]
-        for v in values
-    )
+    # One scale factor for all values; (v - mn) * scale never exceeds the
+    # last block index, so no per-value clamp is needed.
+    scale = (len(blocks) - 1) / (mx - mn if mx != mn else 1)
+    return "".join([blocks[int((v - mn) * scale)] for v in values])
+
+
+# Parsed workloads keyed by path, reused while the file's mtime is unchanged
+_workload_cache: dict[Path, tuple[float, dict]] = {}
+
+
+def _load_workload(path: Path) -> dict:
+    """Load a workload JSON file, reusing the parsed result if unchanged."""
+    mtime = path.stat().st_mtime
+    cached = _workload_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    wl = json.loads(path.read_bytes())
+    _workload_cache[path] = (mtime, wl)
+    return wl
 
 
 def run_benchmark_cli(args) -> None:
@@ -633,7 +1058,7 @@ def run_benchmark_cli(args) -> None:
     custom_prompts = None
     if args.workload:
         try:
-            wl = json.loads(Path(args.workload).read_text(encoding="utf-8"))
+            wl = _load_workload(Path(args.workload))
             custom_prompts = wl.get("prompts", DEFAULT_PROMPTS)
             console.print(f"[dim]Loaded workload: {args.workload} ({len(custom_prompts)} prompts)[/dim]")
         except Exception as e:
@@ -647,9 +1072,9 @@ def run_benchmark_cli(args) -> None:
     elif args.system_prompt == "english":
         system_prompt = ENGLISH_SYSTEM_PROMPT
         prompt_label = "english"
-    elif args.system_prompt and Path(args.system_prompt).exists():
-        system_prompt = Path(args.system_prompt).read_text(encoding="utf-8")
-        prompt_label = Path(args.system_prompt).stem
+    elif args.system_prompt and (p := Path(args.system_prompt)).is_file():
+        system_prompt = p.read_text(encoding="utf-8")
+        prompt_label = p.stem
     else:
         system_prompt = ENGLISH_SYSTEM_PROMPT
         prompt_label = "english"
@@ -659,14 +1084,30 @@ def run_benchmark_cli(args) -> None:
         model=model,
         seed=args.seed,
         temperature=args.temperature,
+        keep_alive=args.keep_alive,
+        sample_memory=args.sample_memory,
     )
 
     try:
-        if args.bench_mode == "sustained":
+        if args.bench_mode == "sustained" and (args.concurrency > 1 or args.batch_size > 1):
+            report = asyncio.run(
+                bench.run_sustained_async(
+                    rounds=args.rounds,
+                    prompts=custom_prompts,
+                    concurrency=args.concurrency,
+                    batch_size=args.batch_size,
+                    system_prompt=system_prompt,
+                    system_prompt_label=prompt_label,
+                    warmup=args.warmup,
+                )
+            )
+        elif args.bench_mode == "sustained":
             report = bench.run_sustained(
                 rounds=args.rounds,
+                prompts=custom_prompts,
                 system_prompt=system_prompt,
                 system_prompt_label=prompt_label,
+                warmup=args.warmup,
             )
         else:
             report = bench.run_context_growth(
@@ -674,6 +1115,8 @@ def run_benchmark_cli(args) -> None:
                 rounds=args.rounds,
                 system_prompt=system_prompt,
                 system_prompt_label=prompt_label,
+                warmup=args.warmup,
+                max_context_tokens=config.max_context_tokens if config.compact_mode else None,
             )
 
         if args.output:
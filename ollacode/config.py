@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -22,31 +22,55 @@ class Config:
     # Memory optimization settings
     max_context_tokens: int = 8192
     compact_mode: bool = True
+    # Hard cap on a tool result kept in history, even with compact mode off
+    max_tool_result_chars: int = 200_000
+
+    # Max read-only tool calls from one response executed at once
+    tool_concurrency_limit: int = 8
 
     @classmethod
     def load(cls) -> Config:
-        """Load configuration from environment variables and .env file."""
-        # Load .env file if present
+        """Load configuration from environment variables and .env file.
+
+        The parsed result is cached and reused while the .env file's mtime
+        and the relevant environment variables are unchanged. Each call
+        returns its own copy, so callers may mutate it freely.
+        """
+        global _cache
+
         env_path = Path.cwd() / ".env"
-        if env_path.exists():
+        try:
+            mtime = env_path.stat().st_mtime
+        except OSError:
+            mtime = 0.0
+
+        # Load .env file if present (and not already loaded at this mtime)
+        if mtime and (_cache is None or _cache[:2] != (env_path, mtime)):
             load_dotenv(env_path)
 
+        snapshot = tuple(os.getenv(key) for key in _ENV_KEYS)
+        if _cache is not None and _cache[:3] == (env_path, mtime, snapshot):
+            cached = _cache[3]
+            return replace(
+                cached, telegram_allowed_users=list(cached.telegram_allowed_users)
+            )
+
         allowed_users_str = os.getenv("TELEGRAM_ALLOWED_USERS", "")
-        allowed_users: list[int] = []
-        if allowed_users_str.strip():
-            allowed_users = [
-                int(uid.strip())
-                for uid in allowed_users_str.split(",")
-                if uid.strip().isdigit()
-            ]
+        allowed_users = [
+            int(uid)
+            for uid in (part.strip() for part in allowed_users_str.split(","))
+            if uid.isdigit()
+        ]
 
         workspace = os.getenv("WORKSPACE_DIR", ".")
         workspace_path = Path(workspace).resolve()
 
         max_tokens = int(os.getenv("MAX_CONTEXT_TOKENS", "8192"))
         compact = os.getenv("COMPACT_MODE", "true").lower() in ("true", "1", "yes")
+        max_result = int(os.getenv("MAX_TOOL_RESULT_CHARS", "200000"))
+        tool_limit = max(1, int(os.getenv("TOOL_CONCURRENCY_LIMIT", "8")))
 
-        return cls(
+        config = cls(
             ollama_host=os.getenv("OLLAMA_HOST", "http://localhost:8080"),
             ollama_model=os.getenv("OLLAMA_MODEL", ""),
             telegram_bot_token=os.getenv("TELEGRAM_BOT_TOKEN", ""),
@@ -54,4 +78,25 @@ class Config:
             workspace_dir=workspace_path,
             max_context_tokens=max_tokens,
             compact_mode=compact,
+            max_tool_result_chars=max_result,
+            tool_concurrency_limit=tool_limit,
         )
+        _cache = (env_path, mtime, snapshot, config)
+        return replace(config, telegram_allowed_users=list(allowed_users))
+
+
+# Environment variables read by Config.load(); part of the cache key.
+_ENV_KEYS = (
+    "OLLAMA_HOST",
+    "OLLAMA_MODEL",
+    "TELEGRAM_BOT_TOKEN",
+    "TELEGRAM_ALLOWED_USERS",
+    "WORKSPACE_DIR",
+    "MAX_CONTEXT_TOKENS",
+    "COMPACT_MODE",
+    "MAX_TOOL_RESULT_CHARS",
+    "TOOL_CONCURRENCY_LIMIT",
+)
+
+# (.env path, .env mtime, env snapshot, config) from the last load()
+_cache: tuple[Path, float, tuple[str | None, ...], Config] | None = None
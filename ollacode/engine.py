@@ -2,28 +2,52 @@
 
 from __future__ import annotations
 
+import asyncio
+import re
+from collections import deque
+from functools import lru_cache
+from itertools import islice
 from typing import AsyncGenerator, Callable, Awaitable, Optional
 
 from .ollama_client import OllamaClient
 from .config import Config
 from .prompts import SYSTEM_PROMPT, load_project_memory
-from .tools import ToolExecutor, parse_tool_calls
+from .tools import (
+    TOOLS_REQUIRING_APPROVAL,
+    ToolExecutor,
+    elide_tool_call_args,
+    parse_tool_calls,
+)
 
 
+# Hiragana, Katakana, CJK Unified Ideographs, Hangul Syllables
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]+")
+
+
+@lru_cache(maxsize=4096)
 def _estimate_tokens(text: str) -> int:
     """Rough token count estimation.
 
     Heuristic: ~4 chars per token for English, ~2 chars per token for CJK.
     This is intentionally simple — no tokenizer dependency needed.
+    Cached per string, so unchanged history messages are only scanned once.
     """
-    cjk_count = sum(1 for c in text if '\u4e00' <= c <= '\u9fff' or
-                    '\uac00' <= c <= '\ud7af' or
-                    '\u3040' <= c <= '\u309f' or
-                    '\u30a0' <= c <= '\u30ff')
+    # Most code and English prose is pure ASCII; skip the regex scan then
+    cjk_count = 0 if text.isascii() else sum(map(len, _CJK_RE.findall(text)))
     ascii_count = len(text) - cjk_count
     return int(ascii_count / 4 + cjk_count / 1.5)
 
 
+# Separator between tool results in the follow-up message
+_SEP = "\n\n---\n\n"
+
+# Tool-output lines worth keeping verbatim when compressing a result:
+# errors, tracebacks, file:line references and file paths
+_SIGNAL_RE = re.compile(
+    r"error|warning|Traceback|❌|:\d+:|/[\w./-]+\.\w+", re.IGNORECASE
+)
+
+
 def _estimate_history_tokens(history: list[dict[str, str]]) -> int:
     """Estimate total tokens in conversation history."""
     return sum(_estimate_tokens(msg.get("content", "")) for msg in history)
@@ -37,25 +61,52 @@ class ConversationEngine:
     # Tool result compression threshold (chars)
     RESULT_COMPACT_THRESHOLD = 800
 
+    # Line-based compression: head/tail lines always kept, plus up to
+    # COMPACT_MAX_SIGNAL_LINES matching lines from the middle
+    COMPACT_HEAD_LINES = 30
+    COMPACT_TAIL_LINES = 20
+    COMPACT_MAX_SIGNAL_LINES = 40
+    COMPACT_LINE_CHARS = 200
+
     # Number of recent messages to always preserve during compaction
     PRESERVE_RECENT = 6
 
+    # Compact once history holds this many messages, whatever their size
+    MAX_HISTORY_MESSAGES = 30
+
+    # Max lines kept in the compaction summary
+    SUMMARY_MAX_ITEMS = 10
+
     def __init__(self, config: Config) -> None:
         self.config = config
         self.client = OllamaClient(config)
         self.tools = ToolExecutor(config.workspace_dir)
         self.history: list[dict[str, str]] = []
         self.auto_approve = False
+        # Server-reported prompt size of the last request, and how many
+        # history messages it covered (0 = unknown, estimate everything)
+        self._last_prompt_tokens = 0
+        self._prompt_messages = 0
+        # Summary message from the last compaction and the lines it holds
+        self._summary_msg: Optional[dict[str, str]] = None
+        self._summary_parts: deque[str] = deque(maxlen=self.SUMMARY_MAX_ITEMS)
+        self._system_msg: Optional[dict[str, str]] = None
         self._init_system_prompt()
 
     def _init_system_prompt(self) -> None:
         """Initialize conversation history with system prompt."""
         project_context = load_project_memory(str(self.config.workspace_dir))
         full_prompt = SYSTEM_PROMPT + project_context
+        self._has_project_memory = bool(project_context)
 
-        self.history = [
-            {"role": "system", "content": full_prompt},
-        ]
+        # Reuse the same message object while the prompt is unchanged, so the
+        # client keeps its encoding and the server sees the same prefix
+        if self._system_msg is None or self._system_msg["content"] != full_prompt:
+            self._system_msg = {"role": "system", "content": full_prompt}
+        self.history = [self._system_msg]
+        self._last_prompt_tokens = 0
+        self._summary_msg = None
+        self._summary_parts.clear()
 
     def clear(self) -> None:
         """Reset conversation history."""
@@ -72,37 +123,95 @@ class ConversationEngine:
         self.tools.approval_callback = callback
 
     def _compact_tool_result(self, tool_name: str, result: str) -> str:
-        """Compress a tool result if it exceeds threshold."""
-        if not self.config.compact_mode:
-            return result
+        """Compress a tool result if it exceeds threshold.
+
+        Multi-line output keeps its head and tail lines, plus any middle
+        lines that carry signal (errors, paths, line numbers) verbatim.
+        With compact mode off, results are only cut at max_tool_result_chars.
+        """
         if len(result) <= self.RESULT_COMPACT_THRESHOLD:
             return result
-
-        # Keep first and last portions
-        preview = result[:300]
-        suffix = result[-200:] if len(result) > 500 else ""
-        truncated = (
-            f"[{tool_name} result — {len(result)} chars, compressed]\n"
-            f"{preview}\n... (truncated) ...\n{suffix}"
+        if not self.config.compact_mode:
+            # Still bound what goes into the prompt
+            cap = self.config.max_tool_result_chars
+            if len(result) <= cap:
+                return result
+            return f"{result[:cap]}\n... (truncated: {len(result)} chars, limit {cap})"
+
+        lines = result.split("\n")
+        head, tail = self.COMPACT_HEAD_LINES, self.COMPACT_TAIL_LINES
+        if len(lines) <= head + tail:
+            # Few long lines: keep first and last portions
+            preview = result[:300]
+            suffix = result[-200:] if len(result) > 500 else ""
+            return (
+                f"[{tool_name} result — {len(result)} chars, compressed]\n"
+                f"{preview}\n... (truncated) ...\n{suffix}"
+            )
+
+        middle = lines[head:-tail]
+        kept = [line for line in middle if _SIGNAL_RE.search(line)]
+        kept = kept[:self.COMPACT_MAX_SIGNAL_LINES]
+        clip = self.COMPACT_LINE_CHARS
+        return "\n".join([
+            f"[{tool_name} result — {len(lines)} lines, compressed]",
+            *(line[:clip] for line in lines[:head]),
+            f"... [middle: kept {len(kept)} of {len(middle)} lines] ...",
+            *(line[:clip] for line in kept),
+            "...",
+            *(line[:clip] for line in lines[-tail:]),
+        ])
+
+    def _elide_last_tool_calls(self) -> None:
+        """Shorten long tool call arguments in the latest assistant message.
+
+        Done once, before the message is first sent back, so the history
+        prefix stays stable for the server's prompt cache afterwards.
+        """
+        if not self.config.compact_mode:
+            return
+        content = self.history[-1]["content"]
+        elided = elide_tool_call_args(content)
+        if elided is not content:
+            self.history[-1] = {"role": "assistant", "content": elided}
+
+    def _record_prompt_tokens(self) -> None:
+        """Remember the server's prompt token count for the current history."""
+        self._last_prompt_tokens = self.client.last_prompt_tokens
+        self._prompt_messages = len(self.history)
+
+    def _history_tokens(self) -> int:
+        """Token count of the current history.
+
+        Uses the server's count for the prefix it last saw and estimates
+        only the messages appended since; falls back to estimating the
+        whole history before the first response or after compaction.
+        """
+        if not self._last_prompt_tokens:
+            return _estimate_history_tokens(self.history)
+        return self._last_prompt_tokens + _estimate_history_tokens(
+            self.history[self._prompt_messages:]
         )
-        return truncated
 
     def _maybe_compact_history(self) -> None:
-        """Compact conversation history if it exceeds token limit.
+        """Compact conversation history if it exceeds the token or message limit.
 
         Strategy:
         - Always keep: system prompt (index 0) + last PRESERVE_RECENT messages
-        - Middle messages: replace with a single summary message
+        - Middle messages: replace with a single summary message; on later
+          compactions only the turns aged out since are folded into it
         - Tool results in old messages are aggressively compressed
         """
         if not self.config.compact_mode:
             return
 
-        total_tokens = _estimate_history_tokens(self.history)
-        threshold = int(self.config.max_context_tokens * 0.8)  # trigger at 80%
+        # Cheap length check first; the token estimate only when needed
+        if len(self.history) <= self.MAX_HISTORY_MESSAGES:
+            total_tokens = self._history_tokens()
+            threshold = int(self.config.max_context_tokens * 0.8)  # trigger at 80%
 
-        if total_tokens <= threshold:
-            return
+            if total_tokens <= threshold:
+                return
 
         # Need to compact. Keep system prompt + recent messages.
         if len(self.history) <= self.PRESERVE_RECENT + 1:
@@ -110,13 +219,18 @@ class ConversationEngine:
             return
 
         # Messages to summarize: everything between system prompt and recent
-        system_msg = self.history[0]
-        old_messages = self.history[1:-self.PRESERVE_RECENT]
-        recent_messages = self.history[-self.PRESERVE_RECENT:]
-
-        # Build a compact summary of old messages
-        summary_parts = []
-        for msg in old_messages:
+        cut = len(self.history) - self.PRESERVE_RECENT
+        start = 1
+        if self.history[1] is self._summary_msg:
+            # Earlier turns are already summarized; fold in only the new ones
+            start = 2
+        else:
+            self._summary_parts.clear()
+
+        # Build a compact summary of old messages; the deque keeps only
+        # the last SUMMARY_MAX_ITEMS lines
+        summary_parts = self._summary_parts
+        for msg in islice(self.history, start, cut):
             role = msg["role"]
             content = msg["content"]
             if role == "user" and content.startswith("[Tool execution results]"):
@@ -124,7 +238,7 @@ class ConversationEngine:
                 summary_parts.append("[tool results processed]")
             elif role == "assistant":
                 # Keep first line of assistant responses
-                first_line = content.split("\n")[0][:150]
+                first_line = content.partition("\n")[0][:150]
                 summary_parts.append(f"Assistant: {first_line}")
             elif role == "user":
                 # Keep user messages but truncated
@@ -132,11 +246,66 @@ class ConversationEngine:
 
         summary_text = (
             "[Previous conversation summary]\n"
-            + "\n".join(summary_parts[-10:])  # Keep last 10 items max
+            + "\n".join(summary_parts)
         )
 
-        # Rebuild history
-        self.history = [system_msg, {"role": "user", "content": summary_text}] + recent_messages
+        # Replace the old messages in place (one slice move, no new list)
+        self._summary_msg = {"role": "user", "content": summary_text}
+        self.history[1:cut] = [self._summary_msg]
+        self._last_prompt_tokens = 0
+
+    async def _run_tools(self, tool_calls: list[dict]) -> list[tuple[str, str]]:
+        """Execute tool calls and return (tool_name, result) in call order.
+
+        Consecutive read-only calls run concurrently, at most
+        tool_concurrency_limit at a time. Calls that modify the workspace
+        or run commands act as barriers, so each sees the effects of the
+        calls issued before it.
+        """
+        names = [call.pop("tool", "") for call in tool_calls]
+        sem = asyncio.Semaphore(self.config.tool_concurrency_limit)
+
+        async def _bounded(name: str, params: dict) -> str:
+            async with sem:
+                return await self.tools.execute(name, params)
+
+        results: list[str | BaseException] = []
+        pending: list[Awaitable[str]] = []
+        for name, params in zip(names, tool_calls):
+            if name in TOOLS_REQUIRING_APPROVAL:
+                results += await asyncio.gather(*pending, return_exceptions=True)
+                pending.clear()
+                results.append(await self.tools.execute(name, params))
+            else:
+                pending.append(_bounded(name, params))
+        results += await asyncio.gather(*pending, return_exceptions=True)
+
+        return [
+            (name, f"❌ Tool error ({name}): {r!r}" if isinstance(r, BaseException) else r)
+            for name, r in zip(names, results)
+        ]
+
+    def _build_follow_up(self, results: list[tuple[str, str]]) -> str:
+        """Build the follow-up user message from (tool_name, result) pairs.
+
+        Compressed results are joined in a single pass.
+        """
+        parts = ["[Tool execution results]\n\n"]
+        has_error = False
+        for tool_name, result in results:
+            parts += (f"**[{tool_name} result]**\n", self._compact_tool_result(tool_name, result), _SEP)
+            if "❌" in result:
+                has_error = True
+        parts.pop()  # trailing separator
+
+        if has_error:
+            parts.append(
+                "\n\n⚠️ Some tools returned errors. "
+                "Please analyze and attempt to fix."
+            )
+        else:
+            parts.append("\n\nPlease respond to the user based on the above results.")
+        return "".join(parts)
 
     async def chat(self, user_message: str) -> str:
         """Process user message and return final response.
@@ -152,36 +321,17 @@ class ConversationEngine:
         response = ""
         for iteration in range(self.MAX_TOOL_ITERATIONS):
             response = await self.client.chat(self.history)
+            self._record_prompt_tokens()
             self.history.append({"role": "assistant", "content": response})
 
             # Detect tool calls
             tool_calls = parse_tool_calls(response)
             if not tool_calls:
                 return response
+            self._elide_last_tool_calls()
 
-            # Execute tools and collect results
-            tool_results = []
-            has_error = False
-            for call in tool_calls:
-                tool_name = call.pop("tool", "")
-                result = await self.tools.execute(tool_name, call)
-                # Compress result for history
-                compact_result = self._compact_tool_result(tool_name, result)
-                tool_results.append(f"**[{tool_name} result]**\n{compact_result}")
-                if "❌" in result:
-                    has_error = True
-
-            # Add tool results to context
-            results_text = "\n\n---\n\n".join(tool_results)
-
-            follow_up = "[Tool execution results]\n\n" + results_text
-            if has_error:
-                follow_up += (
-                    "\n\n⚠️ Some tools returned errors. "
-                    "Please analyze and attempt to fix."
-                )
-            else:
-                follow_up += "\n\nPlease respond to the user based on the above results."
+            # Execute tools and add their results to context
+            follow_up = self._build_follow_up(await self._run_tools(tool_calls))
 
             self.history.append({"role": "user", "content": follow_up})
 
@@ -199,10 +349,12 @@ class ConversationEngine:
 
         for iteration in range(self.MAX_TOOL_ITERATIONS):
             # Streaming response
-            full_response = ""
+            parts: list[str] = []
             async for token in self.client.chat_stream(self.history):
-                full_response += token
+                parts.append(token)
                 yield token
+            self._record_prompt_tokens()
+            full_response = "".join(parts)
 
             self.history.append({"role": "assistant", "content": full_response})
 
@@ -210,19 +362,14 @@ class ConversationEngine:
             tool_calls = parse_tool_calls(full_response)
             if not tool_calls:
                 return
+            self._elide_last_tool_calls()
 
             # Execute tools
-            tool_results = []
-            has_error = False
-            for call in tool_calls:
-                tool_name = call.pop("tool", "")
-                yield f"\n\n⚙️ *Running: {tool_name}...*\n"
-                result = await self.tools.execute(tool_name, call)
-                compact_result = self._compact_tool_result(tool_name, result)
-                tool_results.append(f"**[{tool_name} result]**\n{compact_result}")
-                if "❌" in result:
-                    has_error = True
-
+            yield "".join(
+                f"\n\n⚙️ *Running: {call.get('tool', '')}...*\n" for call in tool_calls
+            )
+            results = await self._run_tools(tool_calls)
+            for tool_name, result in results:
                 # Show short results to user
                 if len(result) < 500:
                     yield f"\n{result}\n"
@@ -230,18 +377,10 @@ class ConversationEngine:
                     yield f"\n✅ {tool_name} done ({len(result)} chars)\n"
 
             # Context for follow-up response
-            results_text = "\n\n---\n\n".join(tool_results)
-            follow_up = "[Tool execution results]\n\n" + results_text
-            if has_error:
-                follow_up += (
-                    "\n\n⚠️ Some tools returned errors. "
-                    "Please analyze and attempt to fix."
-                )
-            else:
-                follow_up += "\n\nPlease respond to the user based on the above results."
+            follow_up = self._build_follow_up(results)
 
             self.history.append({"role": "user", "content": follow_up})
-            yield "\n\n---\n\n"
+            yield _SEP
 
     @property
     def message_count(self) -> int:
@@ -251,11 +390,9 @@ class ConversationEngine:
     @property
     def has_project_memory(self) -> bool:
         """Check if OLLACODE.md was loaded."""
-        if self.history:
-            return "Project Context" in self.history[0].get("content", "")
-        return False
+        return self._has_project_memory
 
     @property
     def estimated_tokens(self) -> int:
         """Estimated token count for current history."""
-        return _estimate_history_tokens(self.history)
+        return self._history_tokens()
@@ -5,11 +5,13 @@ from __future__ import annotations
 import argparse
 import asyncio
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from prompt_toolkit import PromptSession
 from prompt_toolkit.history import InMemoryHistory
 from prompt_toolkit.styles import Style as PTStyle
-from rich.console import Console
+from rich.console import Console, Group
 from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
@@ -72,6 +74,116 @@ HELP_TEXT = """\
   to automatically load project context.
 """
 
+# Parsed once; /help prints it without re-running the markup parser
+HELP_RENDERABLE = Text.from_markup(HELP_TEXT)
+
+
+# Characters that can change how a Markdown paragraph renders
+_MARKDOWN_CHARS = frozenset("`*#[|")
+
+
+def _finished_blocks_len(text: str) -> int:
+    """Length of the leading part of `text` made of complete Markdown blocks.
+
+    Blocks end at a blank line outside a code fence; a trailing line
+    without its newline is still open.
+    """
+    cut = pos = 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if not line.endswith("\n"):
+            break
+        pos += len(line)
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+        elif not stripped and not in_fence:
+            cut = pos
+    return cut
+
+
+def _stack_blocks(blocks: list[Markdown | Text]) -> Group:
+    """Stack separately parsed blocks with the blank line Markdown puts between blocks."""
+    spaced: list[Markdown | Text] = []
+    for block in blocks:
+        if spaced:
+            spaced.append(Text())
+        spaced.append(block)
+    return Group(*spaced)
+
+
+def _prewarm_highlighting() -> None:
+    """Load the code theme and common lexers before the first code block."""
+    from pygments.lexers import get_lexer_by_name
+    from pygments.styles import get_style_by_name
+
+    get_style_by_name("monokai")
+    for name in ("python", "json", "bash", "javascript", "typescript"):
+        get_lexer_by_name(name)
+
+
+class _StreamView:
+    """Incrementally parsed Markdown view of a streamed response.
+
+    Finished blocks are parsed once; only the open tail block is re-parsed
+    on each render, in `pool` so the event loop stays responsive. Parsing
+    block by block can differ from a whole-document parse (loose lists,
+    reference links), so this is only for the transient live view; the
+    final response is parsed once as a whole. One instance is reused
+    across turns.
+    """
+
+    def __init__(self, pool: ThreadPoolExecutor) -> None:
+        self._pool = pool
+        self.blocks: list[Markdown] = []
+        # Text of the parsed blocks, for the final whole-document parse
+        self.done: list[str] = []
+        self.tail: list[str] = []
+
+    def reset(self) -> None:
+        self.blocks.clear()
+        self.done.clear()
+        self.tail.clear()
+
+    def append(self, token: str) -> None:
+        self.tail.append(token)
+
+    async def render(self) -> Group:
+        """Parse newly finished blocks and return the current view."""
+        loop = asyncio.get_running_loop()
+        text = "".join(self.tail)
+        cut = _finished_blocks_len(text)
+        if cut:
+            self.blocks.append(await loop.run_in_executor(
+                self._pool, _render_markdown, text[:cut]
+            ))
+            self.done.append(text[:cut])
+            text = text[cut:]
+            self.tail[:] = [text]
+        shown: list[Markdown | Text] = list(self.blocks)
+        if text and _MARKDOWN_CHARS.isdisjoint(text):
+            # Plain prose so far: nothing for Markdown to do
+            shown.append(Text(text))
+        elif text:
+            shown.append(await loop.run_in_executor(self._pool, _render_markdown, text))
+        return _stack_blocks(shown)
+
+    async def final(self) -> Markdown:
+        """Complete response, parsed as a single document."""
+        text = "".join(self.done) + "".join(self.tail)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._pool, _render_markdown, text
+        )
+
+
+# Separate session so approval answers stay out of the main prompt history
+_approval_session: PromptSession | None = None
+
+
+def _render_markdown(text: str) -> Markdown:
+    """Parse a (partial) response for the streaming view."""
+    return Markdown(text, code_theme="monokai")
+
 
 async def cli_approval_callback(tool_name: str, description: str) -> bool:
     """Request tool execution approval in CLI."""
@@ -85,13 +197,15 @@ async def cli_approval_callback(tool_name: str, description: str) -> bool:
         )
     )
 
+    global _approval_session
+    if _approval_session is None:
+        _approval_session = PromptSession()
+
     try:
-        response = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: input("  Approve? (y/n/a=always) ❯ ").strip().lower(),
-        )
+        response = await _approval_session.prompt_async("  Approve? (y/n/a=always) ❯ ")
     except (EOFError, KeyboardInterrupt):
         return False
+    response = response.strip().lower()
 
     if response in ("a", "always"):
         console.print("[success]  ✅ Auto-approving all future actions.[/success]")
@@ -145,6 +259,13 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
         )
     )
 
+    # Markdown parsing is the only blocking work left in the loop, and it
+    # runs one render at a time; a single named thread is all it needs
+    render_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ollacode-render")
+    view = _StreamView(render_pool)
+    # Load Pygments style/lexers on the render thread while the user types
+    render_pool.submit(_prewarm_highlighting)
+
     session: PromptSession = PromptSession(
         history=InMemoryHistory(),
         style=PT_STYLE,
@@ -153,11 +274,8 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
     try:
         while True:
             try:
-                user_input = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: session.prompt(
-                        [("class:prompt", "ollacode ❯ ")],
-                    ),
+                user_input = await session.prompt_async(
+                    [("class:prompt", "ollacode ❯ ")],
                 )
             except EOFError:
                 break
@@ -180,7 +298,7 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
                     console.print("[success]✅ Conversation history cleared.[/success]")
                     continue
                 elif cmd == "/help":
-                    console.print(HELP_TEXT)
+                    console.print(HELP_RENDERABLE)
                     continue
                 elif cmd == "/model":
                     console.print(
@@ -188,6 +306,7 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
                         f"Server: [cyan]{config.ollama_host}[/cyan]\n"
                         f"Messages: [cyan]{engine.message_count}[/cyan]\n"
                         f"Est. tokens: [cyan]{engine.estimated_tokens}[/cyan] / {config.max_context_tokens}\n"
+                        f"Prompt cache: [cyan]{engine.client.last_cached_tokens}[/cyan] tokens reused\n"
                         f"Project memory: [cyan]{'loaded' if engine.has_project_memory else 'none'}[/cyan]\n"
                         f"Compact mode: [cyan]{config.compact_mode}[/cyan]\n"
                         f"Auto-approve: [cyan]{engine.auto_approve}[/cyan][/info]"
@@ -208,7 +327,7 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
 
             # Streaming response
             console.print()
-            full_response = ""
+            view.reset()
             try:
                 with Live(
                     Text("⏳ Thinking...", style="dim"),
@@ -216,11 +335,30 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
                     refresh_per_second=8,
                     transient=True,
                 ) as live:
-                    async for token in engine.chat_stream(user_input):
-                        full_response += token
-                        live.update(
-                            Markdown(full_response, code_theme="monokai")
-                        )
+                    # Render on a fixed tick rather than per token; waiting on
+                    # the next token with a deadline also flushes the view
+                    # when tokens pause (e.g. while a tool runs)
+                    stream = engine.chat_stream(user_input)
+                    next_token = asyncio.ensure_future(anext(stream))
+                    next_render = 0.0
+                    dirty = False
+                    try:
+                        while True:
+                            timeout = max(0.0, next_render - time.monotonic()) if dirty else None
+                            done, _ = await asyncio.wait({next_token}, timeout=timeout)
+                            if not done:
+                                live.update(await view.render())
+                                dirty = False
+                                next_render = time.monotonic() + 0.125
+                                continue
+                            try:
+                                view.append(next_token.result())
+                            except StopAsyncIteration:
+                                break
+                            next_token = asyncio.ensure_future(anext(stream))
+                            dirty = True
+                    finally:
+                        next_token.cancel()
 
             except KeyboardInterrupt:
                 console.print("\n[warning]⚠️ Response interrupted.[/warning]")
@@ -232,7 +370,7 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
             # Render final response in panel
             console.print(
                 Panel(
-                    Markdown(full_response, code_theme="monokai"),
+                    await view.final(),
                     title="[bold magenta]ollacode[/bold magenta]",
                     border_style="magenta",
                     padding=(1, 2),
@@ -240,9 +378,21 @@ async def run_cli(config: Config, auto_approve: bool = False) -> None:
             )
 
     finally:
+        render_pool.shutdown(wait=False)
         await engine.close()
 
 
+def _use_uvloop() -> None:
+    """Run asyncio on uvloop when it is installed (not available on Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    # A policy rather than asyncio.run(loop_factory=...) so that the loop
+    # python-telegram-bot creates internally is covered too
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 def main() -> None:
     """Entry point."""
     parser = argparse.ArgumentParser(
@@ -280,6 +430,26 @@ def main() -> None:
         choices=["context-growth", "sustained"],
         help="Benchmark mode (default: context-growth)"
     )
+    bench_parser.add_argument(
+        "--concurrency", type=int, default=1,
+        help="Sustained mode: rounds in flight at once (default: 1)"
+    )
+    bench_parser.add_argument(
+        "--batch-size", type=int, default=1, dest="batch_size",
+        help="Sustained mode: identical requests fired together per round (default: 1)"
+    )
+    bench_parser.add_argument(
+        "--warmup", type=int, default=1,
+        help="Unrecorded warmup requests before round 1 (default: 1)"
+    )
+    bench_parser.add_argument(
+        "--keep-alive", default="30m", dest="keep_alive",
+        help="How long Ollama keeps the model loaded between rounds (default: 30m)"
+    )
+    bench_parser.add_argument(
+        "--no-memory", action="store_false", dest="sample_memory",
+        help="Skip sampling Ollama process memory"
+    )
     bench_parser.add_argument(
         "--output", default=None, help="Save results to JSON file"
     )
@@ -313,10 +483,12 @@ def main() -> None:
 
     if command == "cli":
         auto = getattr(args, "auto_approve", False)
+        _use_uvloop()
         asyncio.run(run_cli(config, auto_approve=auto))
     elif command == "telegram":
         from .telegram_bot import run_telegram_bot
 
+        _use_uvloop()
         run_telegram_bot(config)
     elif command == "benchmark":
         from .benchmark import run_benchmark_cli
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 from typing import AsyncGenerator
 
@@ -10,20 +11,146 @@ import httpx
 from .config import Config
 
 
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# 서버 주소별 공유 HTTP 클라이언트와 참조 수 (텔레그램처럼 엔진이 여럿일 때
+# 사용자마다 연결 풀을 따로 두지 않도록)
+_shared_clients: dict[str, httpx.AsyncClient] = {}
+_client_refs: dict[str, int] = {}
+
+
+def _sse_payload(line: bytes | bytearray) -> bytes:
+    """SSE 한 줄에서 "data:" 접두사를 떼어낸 페이로드를 반환합니다."""
+    line = line.strip()
+    if line.startswith(b"data:"):
+        line = line[5:].lstrip()
+    return bytes(line)
+
+
+async def _aiter_sse_data(resp: httpx.Response) -> AsyncGenerator[bytes, None]:
+    """SSE 응답 본문에서 각 줄의 data 페이로드를 bytes로 yield합니다.
+
+    str 디코딩 없이 bytes 버퍼에서 직접 줄을 나누며, [DONE]에서 끝납니다.
+    """
+    buf = bytearray()
+    async for chunk in resp.aiter_bytes():
+        buf += chunk
+        start = 0
+        while (nl := buf.find(b"\n", start)) != -1:
+            data = _sse_payload(buf[start:nl])
+            start = nl + 1
+            if not data:
+                continue
+            if data == b"[DONE]":
+                return
+            yield data
+        del buf[:start]
+
+    data = _sse_payload(buf)
+    if data and data != b"[DONE]":
+        yield data
+
+
 class OllamaClient:
     """llama-server REST API 클라이언트 (OpenAI-compatible)."""
 
+    __slots__ = (
+        "base_url",
+        "model",
+        "_client",
+        "_closed",
+        "_warmup_task",
+        "last_prompt_tokens",
+        "last_completion_tokens",
+        "last_cached_tokens",
+        "last_prefix_stable",
+        "_encoded",
+    )
+
     def __init__(self, config: Config) -> None:
         self.base_url = config.ollama_host
         self.model = config.ollama_model
-        self._client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=httpx.Timeout(connect=10.0, read=300.0, write=10.0, pool=10.0),
+        self._closed = False
+        self._warmup_task: asyncio.Task | None = None
+        client = _shared_clients.get(self.base_url)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=True,
+                timeout=httpx.Timeout(connect=10.0, read=300.0, write=10.0, pool=10.0),
+                limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=300.0),
+            )
+            _shared_clients[self.base_url] = client
+            # 첫 요청이 연결 수립 비용을 치르지 않도록 미리 연결해 둠
+            try:
+                self._warmup_task = asyncio.get_running_loop().create_task(self._warmup())
+            except RuntimeError:
+                pass  # 이벤트 루프 밖에서 생성된 경우
+        _client_refs[self.base_url] = _client_refs.get(self.base_url, 0) + 1
+        self._client = client
+        # 마지막 요청에 대해 서버가 보고한 토큰 수 (보고가 없으면 0)
+        self.last_prompt_tokens = 0
+        self.last_completion_tokens = 0
+        # 서버 KV 캐시에서 재사용된 프롬프트 토큰 수 (보고가 없으면 0)
+        self.last_cached_tokens = 0
+        # 마지막 요청이 직전 요청의 메시지 전체를 앞부분으로 그대로 포함했는지
+        # (False면 압축 등으로 접두사가 바뀌어 서버 캐시가 무효화됨)
+        self.last_prefix_stable = False
+        # 직전 요청의 (메시지, 인코딩된 JSON) 목록 — 변하지 않은 앞부분은 재사용
+        self._encoded: list[tuple[dict, bytes]] = []
+
+    def _build_body(self, messages: list[dict[str, str]], payload: dict) -> bytes:
+        """payload에 messages를 붙인 요청 본문을 만듭니다.
+
+        대화 기록은 호출 사이에 뒤에만 추가되므로(압축 시에는 교체됨),
+        같은 위치에 같은 객체가 있는 메시지는 이전 인코딩을 그대로 씁니다.
+        """
+        cache = self._encoded
+        reused = 0
+        for msg, (cached_msg, _) in zip(messages, cache):
+            if msg is not cached_msg:
+                break
+            reused += 1
+        self.last_prefix_stable = bool(cache) and reused == len(cache)
+        del cache[reused:]
+        cache.extend(
+            (msg, json.dumps(msg, ensure_ascii=False).encode())
+            for msg in messages[reused:]
         )
+        return b"".join((
+            json.dumps(payload, ensure_ascii=False).encode()[:-1],
+            b', "messages": [',
+            b", ".join(encoded for _, encoded in cache),
+            b"]}",
+        ))
+
+    def _record_usage(self, usage: dict | None) -> None:
+        """응답의 usage 필드에서 토큰 수를 기록합니다."""
+        usage = usage or {}
+        self.last_prompt_tokens = usage.get("prompt_tokens", 0)
+        self.last_completion_tokens = usage.get("completion_tokens", 0)
+        details = usage.get("prompt_tokens_details") or {}
+        self.last_cached_tokens = details.get("cached_tokens", 0)
+
+    async def _warmup(self) -> None:
+        """연결 풀에 keep-alive 연결을 하나 만들어 둡니다."""
+        try:
+            await self._client.get("/health")
+        except httpx.HTTPError:
+            pass
 
     async def close(self) -> None:
-        """HTTP 클라이언트를 종료합니다."""
-        await self._client.aclose()
+        """HTTP 클라이언트를 종료합니다 (공유 중이면 마지막 사용자만 실제로 닫음)."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+        _client_refs[self.base_url] -= 1
+        if _client_refs[self.base_url] == 0:
+            del _client_refs[self.base_url]
+            del _shared_clients[self.base_url]
+            await self._client.aclose()
 
     async def chat(
         self,
@@ -34,16 +161,21 @@ class OllamaClient:
         """비스트리밍 채팅 요청을 보내고 전체 응답을 반환합니다."""
         payload = {
             "model": self.model,
-            "messages": messages,
             "stream": False,
             "temperature": temperature,
             "repeat_penalty": 1.1,
             "n_predict": 4096,
+            "cache_prompt": True,
         }
 
-        resp = await self._client.post("/v1/chat/completions", json=payload)
+        resp = await self._client.post(
+            "/v1/chat/completions",
+            content=self._build_body(messages, payload),
+            headers=_JSON_HEADERS,
+        )
         resp.raise_for_status()
         data = resp.json()
+        self._record_usage(data.get("usage"))
         return data.get("choices", [{}])[0].get("message", {}).get("content", "")
 
     async def chat_stream(
@@ -55,40 +187,36 @@ class OllamaClient:
         """스트리밍 채팅 요청을 보내고 토큰을 하나씩 yield합니다."""
         payload = {
             "model": self.model,
-            "messages": messages,
             "stream": True,
+            "stream_options": {"include_usage": True},
             "temperature": temperature,
             "repeat_penalty": 1.1,
             "n_predict": 4096,
+            "cache_prompt": True,
         }
 
-        async with self._client.stream("POST", "/v1/chat/completions", json=payload) as resp:
+        self._record_usage(None)
+        body = self._build_body(messages, payload)
+        async with self._client.stream(
+            "POST", "/v1/chat/completions", content=body, headers=_JSON_HEADERS
+        ) as resp:
             resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                line = line.strip()
-                if not line:
-                    continue
-
-                if line.startswith("data: "):
-                    line = line[6:]
-
-                if line == "[DONE]":
-                    break
-
+            async for data in _aiter_sse_data(resp):
                 try:
-                    chunk = json.loads(line)
+                    chunk = json.loads(data)
                 except json.JSONDecodeError:
                     continue
 
-                delta = chunk.get("choices", [{}])[0].get("delta", {})
+                if chunk.get("usage"):
+                    self._record_usage(chunk["usage"])
+
+                # usage 전용 청크는 choices가 비어 있음
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta") or {}
                 content = delta.get("content", "")
                 if content:
                     yield content
 
-                finish = chunk.get("choices", [{}])[0].get("finish_reason")
-                if finish == "stop":
-                    break
-
     async def check_health(self) -> bool:
         """서버 상태를 확인합니다."""
         try:
@@ -1,5 +1,8 @@
 """System prompt definitions."""
 
+from functools import lru_cache
+from pathlib import Path
+
 SYSTEM_PROMPT = """\
 You are **ollacode**, an expert coding assistant. /no_think
 
@@ -36,13 +39,20 @@ Format:
 
 
 def load_project_memory(workspace_dir: str) -> str:
-    """Load OLLACODE.md for project context."""
-    from pathlib import Path
+    """Load OLLACODE.md for project context.
 
+    The result is cached per file and re-read only when its mtime changes.
+    """
     memory_path = Path(workspace_dir) / "OLLACODE.md"
-    if not memory_path.exists():
+    try:
+        mtime_ns = memory_path.stat().st_mtime_ns
+    except OSError:
         return ""
+    return _load_project_memory(memory_path, mtime_ns)
+
 
+@lru_cache(maxsize=8)
+def _load_project_memory(memory_path: Path, mtime_ns: int) -> str:
     try:
         content = memory_path.read_text(encoding="utf-8")
     except Exception:
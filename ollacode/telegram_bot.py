@@ -5,12 +5,18 @@ from __future__ import annotations
 import asyncio
 import html
 import logging
+import re
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from telegram.constants import ParseMode, ChatAction
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CallbackQueryHandler,
     CommandHandler,
@@ -21,23 +27,50 @@ from telegram.ext import (
 
 from .config import Config
 from .engine import ConversationEngine
+from .tools import strip_tool_blocks
 
 logger = logging.getLogger(__name__)
 
-# Per-user conversation engines
-_sessions: Dict[int, ConversationEngine] = {}
+# Per-user conversation engines, least recently used first
+_sessions: OrderedDict[int, ConversationEngine] = OrderedDict()
+_last_seen: Dict[int, float] = {}
+# Idle sessions are dropped (and their HTTP clients closed) past these limits
+_MAX_SESSIONS = 256
+_SESSION_TTL = 3600.0
+_closing: set[asyncio.Task] = set()
 # Pending approval queue: {approval_id: asyncio.Future}
 _pending_approvals: Dict[str, asyncio.Future] = {}
+# Reply formatting runs here so a long response doesn't stall other users
+_format_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tg-fmt")
 
 
 def _get_engine(user_id: int, config: Config) -> ConversationEngine:
     """Get or create a conversation engine for a user."""
-    if user_id not in _sessions:
+    now = time.monotonic()
+    engine = _sessions.get(user_id)
+    if engine is None:
         engine = ConversationEngine(config)
         # Auto-approve in Telegram (inline button complexity consideration)
         engine.auto_approve = True
         _sessions[user_id] = engine
-    return _sessions[user_id]
+    else:
+        _sessions.move_to_end(user_id)
+    _last_seen[user_id] = now
+    _evict_sessions(now)
+    return engine
+
+
+def _evict_sessions(now: float) -> None:
+    """Drop sessions over the size limit or idle longer than the TTL."""
+    while _sessions:
+        oldest = next(iter(_sessions))
+        if len(_sessions) <= _MAX_SESSIONS and now - _last_seen[oldest] < _SESSION_TTL:
+            break
+        engine = _sessions.pop(oldest)
+        del _last_seen[oldest]
+        task = asyncio.get_running_loop().create_task(engine.close())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
 
 
 def _check_allowed(user_id: int, config: Config) -> bool:
@@ -51,74 +84,99 @@ def _split_message(text: str, max_length: int = 4000) -> list[str]:
     """Split long messages for Telegram's limit."""
     if len(text) <= max_length:
         return [text]
-
-    parts = []
-    current = ""
-
-    for line in text.split("\n"):
-        if len(current) + len(line) + 1 > max_length:
-            if current:
-                parts.append(current)
-            while len(line) > max_length:
-                parts.append(line[:max_length])
-                line = line[max_length:]
-            current = line
+    return list(_split_message_cached(text, max_length))
+
+
+@lru_cache(maxsize=512)
+def _split_message_cached(text: str, max_length: int) -> tuple[str, ...]:
+    # Every part is a contiguous slice of text, so walk the line breaks
+    # and cut slices instead of splitting and re-joining lines
+    parts: list[str] = []
+    start = 0  # where the part being built begins
+    current_len = 0  # its length so far
+    pos = 0
+    while True:
+        nl = text.find("\n", pos)
+        line_len = (len(text) if nl == -1 else nl) - pos
+        if current_len + line_len + 1 > max_length:
+            if current_len:
+                parts.append(text[start:start + current_len])
+            while line_len > max_length:
+                parts.append(text[pos:pos + max_length])
+                pos += max_length
+                line_len -= max_length
+            start, current_len = pos, line_len
+        elif current_len:
+            current_len += line_len + 1
         else:
-            current = current + "\n" + line if current else line
+            start, current_len = pos, line_len
+        if nl == -1:
+            break
+        pos = nl + 1
+
+    if current_len:
+        parts.append(text[start:start + current_len])
+
+    return tuple(parts)
 
-    if current:
-        parts.append(current)
 
-    return parts
+# ─── Markdown → Telegram HTML patterns ───────────────────────
+# Fenced code blocks are taken out before inline code, so a stray
+# backtick in prose can't pair with the start of a fence; inline code
+# never spans an extracted block's placeholder
+_CODE_RE = re.compile(r"```(\w*)\n(.*?)```", re.DOTALL)
+_INLINE_RE = re.compile(r"`([^`\x00]+)`")
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+_ITAL_RE = re.compile(r"\*(.+?)\*")
+# Code is swapped out for NUL-delimited indices, which html.escape and the
+# emphasis patterns leave alone, and swapped back in a single pass
+_PLACEHOLDER_RE = re.compile(r"\x00(\d+)\x00")
 
 
 def _escape_html(text: str) -> str:
     """Escape HTML special characters while preserving allowed tags."""
-    import re
+    return _escape_html_cached(text)
 
-    # Remove tool code blocks (not needed for user display)
-    text = re.sub(r"```tool\s*\n.+?\n```", "", text, flags=re.DOTALL)
 
-    # Extract code blocks
-    code_blocks: list[tuple[str, str]] = []
-    counter = [0]
+# Help/error texts and common replies repeat across users; the conversion
+# is pure, so identical inputs are served from the cache
+@lru_cache(maxsize=512)
+def _escape_html_cached(text: str) -> str:
+    code: list[str] = []
 
-    def replace_code_block(match: re.Match) -> str:
-        lang = match.group(1) or ""
-        code = match.group(2)
-        placeholder = f"__CODE_BLOCK_{counter[0]}__"
-        code_blocks.append((placeholder, f"<pre><code class=\"language-{lang}\">{html.escape(code)}</code></pre>"))
-        counter[0] += 1
-        return placeholder
-
-    # Extract inline code
-    inline_codes: list[tuple[str, str]] = []
-    inline_counter = [0]
+    def extract_block(match: re.Match) -> str:
+        lang, block = match.groups()
+        code.append(
+            f"<pre><code class=\"language-{lang}\">{html.escape(block)}</code></pre>"
+        )
+        return f"\x00{len(code) - 1}\x00"
 
-    def replace_inline_code(match: re.Match) -> str:
-        code = match.group(1)
-        placeholder = f"__INLINE_CODE_{inline_counter[0]}__"
-        inline_codes.append((placeholder, f"<code>{html.escape(code)}</code>"))
-        inline_counter[0] += 1
-        return placeholder
+    def extract_inline(match: re.Match) -> str:
+        code.append(f"<code>{html.escape(match.group(1))}</code>")
+        return f"\x00{len(code) - 1}\x00"
 
-    processed = re.sub(r"```(\w*)\n(.*?)```", replace_code_block, text, flags=re.DOTALL)
-    processed = re.sub(r"`([^`]+)`", replace_inline_code, processed)
+    processed = text.replace("\x00", "")
+    # Plain prose has no backticks at all: skip the code scans
+    if "`" in processed:
+        # Remove tool code blocks (not needed for user display)
+        processed = _CODE_RE.sub(extract_block, strip_tool_blocks(processed))
+        processed = _INLINE_RE.sub(extract_inline, processed)
 
     # Escape remaining
     processed = html.escape(processed)
 
     # Markdown → HTML
-    processed = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", processed)
-    processed = re.sub(r"\*(.+?)\*", r"<i>\1</i>", processed)
+    processed = _BOLD_RE.sub(r"<b>\1</b>", processed)
+    processed = _ITAL_RE.sub(r"<i>\1</i>", processed)
+
+    if not code:
+        return processed
+    return _PLACEHOLDER_RE.sub(lambda m: code[int(m.group(1))], processed)
 
-    # Restore
-    for placeholder, replacement in code_blocks:
-        processed = processed.replace(html.escape(placeholder), replacement)
-    for placeholder, replacement in inline_codes:
-        processed = processed.replace(html.escape(placeholder), replacement)
 
-    return processed
+def _format_reply(text: str) -> list[str]:
+    """Convert a response to Telegram HTML and split it into messages."""
+    return _split_message(_escape_html(text))
 
 
 def run_telegram_bot(config: Config) -> None:
@@ -223,8 +281,13 @@ def run_telegram_bot(config: Config) -> None:
 
         engine = _get_engine(user.id, config)
 
-        # Show typing action
-        await update.message.chat.send_action(ChatAction.TYPING)
+        # Show typing action while the model starts; no need to wait for it.
+        # The reference keeps the task alive; its outcome is only retrieved
+        # so a failed indicator is not reported as an unhandled exception.
+        typing_task = asyncio.create_task(
+            update.message.chat.send_action(ChatAction.TYPING)
+        )
+        typing_task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
         try:
             response = await engine.chat(update.message.text)
@@ -237,19 +300,32 @@ def run_telegram_bot(config: Config) -> None:
             return
 
         # Send response
-        formatted = _escape_html(response)
-        parts = _split_message(formatted)
+        parts = await asyncio.get_running_loop().run_in_executor(
+            _format_pool, _format_reply, response
+        )
+
+        message = update.message
 
-        for part in parts:
+        async def send_part(part: str, **kwargs) -> Message:
             try:
-                await update.message.reply_text(
+                return await message.reply_text(
                     part,
                     parse_mode=ParseMode.HTML,
+                    **kwargs,
                 )
             except Exception:
                 # Fall back to plain text on HTML parse failure
                 plain = response[:4000]
-                await update.message.reply_text(plain)
+                return await message.reply_text(plain, **kwargs)
+
+        # The first part goes out alone; the rest are sent concurrently as
+        # replies to it, so they stay anchored even if they land out of order
+        first = await send_part(parts[0])
+        if len(parts) > 1:
+            await asyncio.gather(*(
+                send_part(part, reply_to_message_id=first.message_id)
+                for part in parts[1:]
+            ))
 
     # ─── Run bot ─────────────────────────────────────────────
 
@@ -264,7 +340,14 @@ def run_telegram_bot(config: Config) -> None:
         f"   Ctrl+C to stop"
     )
 
-    app = Application.builder().token(config.telegram_bot_token).build()
+    # Keeps replies under Telegram's flood limits (30 msg/s overall,
+    # 20 msg/min per group) and retries once if a 429 still comes back
+    app = (
+        Application.builder()
+        .token(config.telegram_bot_token)
+        .rate_limiter(AIORateLimiter(max_retries=1))
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start_handler))
     app.add_handler(CommandHandler("help", help_handler))
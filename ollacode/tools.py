@@ -4,12 +4,17 @@ from __future__ import annotations
 
 import asyncio
 import difflib
-import glob
+import fnmatch
 import json
 import os
 import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, repeat
 from pathlib import Path
-from typing import Callable, Awaitable, Optional
+from typing import Callable, Awaitable, Iterator, Optional
 
 
 class ToolError(Exception):
@@ -19,12 +24,35 @@ class ToolError(Exception):
 # ─── Tools that require user approval ─────────────────────────
 TOOLS_REQUIRING_APPROVAL = {"write_file", "edit_file", "run_command"}
 
+# Directories never descended into by search_files / grep_search
+_IGNORED_DIRS = frozenset({"node_modules", "__pycache__", ".git", "venv", ".venv"})
+
+# grep_search skips these without reading them (unless given as the path)
+_BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".pdf",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".tar", ".jar", ".whl",
+    ".so", ".dylib", ".dll", ".exe", ".bin", ".o", ".a", ".class", ".pyc",
+    ".mp3", ".mp4", ".mov", ".wav", ".woff", ".woff2", ".ttf", ".sqlite", ".db",
+})
+_GREP_MAX_FILE_BYTES = 2 * 1024 * 1024
+
+# run_command refuses commands containing any of these; a space in an
+# entry matches any run of whitespace
+_DANGEROUS_COMMANDS = ["rm -rf /", "mkfs", "dd if=", ":(){", "fork bomb"]
+_DANGEROUS_RE = re.compile(
+    "|".join(re.escape(d).replace(r"\ ", r"\s+") for d in _DANGEROUS_COMMANDS),
+    re.IGNORECASE,
+)
+
 
 class ToolExecutor:
     """Coding tool executor. Operates only within workspace_dir."""
 
     def __init__(self, workspace_dir: Path) -> None:
         self.workspace_dir = workspace_dir.resolve()
+        # String forms for the containment checks done per walked file
+        self._workspace_str = str(self.workspace_dir)
+        self._workspace_prefix = self._workspace_str.rstrip(os.sep) + os.sep
         # Approval callback: (tool_name, description) -> bool
         # None means auto-approve mode
         self.approval_callback: Optional[
@@ -39,7 +67,7 @@ class ToolExecutor:
         p = p.resolve()
 
         # Security: block access outside workspace
-        if not str(p).startswith(str(self.workspace_dir)):
+        if not self._in_workspace(str(p)):
             raise ToolError(
                 f"⛔ Security error: cannot access path outside workspace.\n"
                 f"  Requested: {path_str}\n"
@@ -47,6 +75,20 @@ class ToolExecutor:
             )
         return p
 
+    def _in_workspace(self, resolved: str) -> bool:
+        """Whether a resolved path string is the workspace or inside it."""
+        return resolved == self._workspace_str or resolved.startswith(self._workspace_prefix)
+
+    def _relative(self, path: str) -> str:
+        """Workspace-relative form of a path string found under the workspace.
+
+        Walk results already start with the workspace prefix, so slicing
+        it off replaces os.path.relpath()'s normalisation per result.
+        """
+        if path.startswith(self._workspace_prefix):
+            return path[len(self._workspace_prefix):]
+        return os.path.relpath(path, self._workspace_str)
+
     async def _request_approval(self, tool_name: str, description: str) -> bool:
         """Request user approval before tool execution."""
         if self.approval_callback is None:
@@ -83,18 +125,20 @@ class ToolExecutor:
         if not path.is_file():
             return f"❌ Not a file: {path}"
 
+        # Support start_line / end_line params
+        start = max(1, int(params.get("start_line", 1))) - 1
+        end_line = int(params.get("end_line", 200))
+
         try:
-            content = path.read_text(encoding="utf-8")
+            content, line_count = await asyncio.to_thread(
+                _read_head, path, end_line, _file_cache.read
+            )
         except UnicodeDecodeError:
             return f"❌ Cannot read binary file: {path}"
 
-        lines = content.split("\n")
-        line_count = len(lines)
-
-        # Support start_line / end_line params
-        start = max(1, int(params.get("start_line", 1))) - 1
-        end = min(line_count, int(params.get("end_line", 200)))
-        display_lines = lines[start:end]
+        end = min(line_count, end_line)
+        # Only split off as many lines as will be shown
+        display_lines = content.split("\n", end)[start:end]
 
         # Add line numbers
         numbered = "\n".join(
@@ -119,8 +163,8 @@ class ToolExecutor:
         description = f"📝 File {action}: {path.name} ({line_count} lines)"
 
         if existed:
-            old_content = path.read_text(encoding="utf-8")
-            diff = _generate_diff(old_content, content, path.name)
+            old_content = await asyncio.to_thread(_file_cache.read, path)
+            diff = await _generate_diff_async(old_content, content, path.name)
             description += f"\n{diff}"
 
         if not await self._request_approval("write_file", description):
@@ -128,7 +172,8 @@ class ToolExecutor:
 
         # Create parent directories
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(content, encoding="utf-8")
+        await asyncio.to_thread(_write_text, path, content)
+        _file_cache.discard(path)
         return f"✅ File {action} done: {path.name} ({line_count} lines)"
 
     async def _edit_file(self, params: dict) -> str:
@@ -146,38 +191,43 @@ class ToolExecutor:
             return "❌ 'search' parameter is required."
 
         try:
-            content = path.read_text(encoding="utf-8")
+            content = await asyncio.to_thread(_file_cache.read, path)
         except UnicodeDecodeError:
             return f"❌ Cannot edit binary file: {path}"
 
         # Find search string
-        count = content.count(search)
-        if count == 0:
-            # Try to find similar lines
-            close = difflib.get_close_matches(
-                search.split("\n")[0],
-                content.split("\n"),
-                n=3,
-                cutoff=0.6,
-            )
+        pos = content.find(search)
+        if pos == -1:
+            # Try to find similar lines. A ratio of 0.6 needs the shorter
+            # string to be at least 3/7 the length of the longer one, so
+            # lines outside that range can't match and are dropped first
+            first = search.split("\n", 1)[0]
+            size = len(first)
+            candidates = [
+                line for line in content.split("\n")
+                if 3 * max(size, len(line)) <= 7 * min(size, len(line))
+            ]
+            close = difflib.get_close_matches(first, candidates, n=3, cutoff=0.6)
             hint = ""
             if close:
                 hint = "\nSimilar lines:\n" + "\n".join(f"  → {c}" for c in close)
             return f"❌ Search string not found.{hint}"
 
-        if count > 1:
+        if content.find(search, pos + len(search)) != -1:
+            count = content.count(search)
             return f"⚠️ Search string found {count} times. Please be more specific."
 
         # Generate diff preview
-        new_content = content.replace(search, replace, 1)
-        diff = _generate_diff(content, new_content, path.name)
+        new_content = content[:pos] + replace + content[pos + len(search):]
+        diff = await _generate_diff_async(content, new_content, path.name)
         description = f"✏️ Edit file: {path.name}\n{diff}"
 
         if not await self._request_approval("edit_file", description):
             return "⏭️ User rejected edit."
 
         # Apply
-        path.write_text(new_content, encoding="utf-8")
+        await asyncio.to_thread(_write_text, path, new_content)
+        _file_cache.discard(path)
         return f"✅ File edited: {path.name} (1 change applied)"
 
     async def _list_directory(self, params: dict) -> str:
@@ -187,14 +237,13 @@ class ToolExecutor:
         if not path.is_dir():
             return f"❌ Not a directory: {path}"
 
-        entries = sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name))
+        total, entries = await asyncio.to_thread(_scan_directory, path)
         lines = []
         for entry in entries[:100]:
-            if entry.name.startswith("."):
-                continue
-            icon = "📁" if entry.is_dir() else "📄"
+            is_dir = entry.is_dir()
+            icon = "📁" if is_dir else "📄"
             size = ""
-            if entry.is_file():
+            if not is_dir and entry.is_file():
                 size_bytes = entry.stat().st_size
                 if size_bytes < 1024:
                     size = f" ({size_bytes}B)"
@@ -204,7 +253,6 @@ class ToolExecutor:
                     size = f" ({size_bytes / (1024 * 1024):.1f}MB)"
             lines.append(f"  {icon} {entry.name}{size}")
 
-        total = len(list(path.iterdir()))
         header = f"📂 **{path.name or '/'}** ({total} items)"
         return header + "\n" + "\n".join(lines)
 
@@ -215,26 +263,71 @@ class ToolExecutor:
         if not base.exists():
             return f"❌ Path not found: {base}"
 
-        matches = sorted(glob.glob(str(base / "**" / pattern), recursive=True))
-        # Filter to workspace only
-        matches = [
-            m for m in matches
-            if str(Path(m).resolve()).startswith(str(self.workspace_dir))
-        ]
+        matches = await asyncio.to_thread(self._find_files, base, pattern)
 
         if not matches:
             return f"🔍 No files matching '{pattern}'."
 
-        lines = []
-        for m in matches[:50]:
-            rel = os.path.relpath(m, self.workspace_dir)
-            lines.append(f"  📄 {rel}")
+        lines = [f"  📄 {self._relative(m)}" for m in matches[:50]]
 
         result = f"🔍 '{pattern}' results ({len(matches)} files)"
         if len(matches) > 50:
             result += " — showing first 50"
         return result + "\n" + "\n".join(lines)
 
+    def _find_files(self, base: Path, pattern: str) -> list[str]:
+        """Walk `base` for entries matching `pattern` (runs in a thread).
+
+        Same results as glob("**/pattern"), but ignored directories are
+        pruned instead of walked. Like glob, pattern segments match one
+        path component each, and hidden entries only match segments that
+        start with ".".
+        """
+        segments = ["**"]
+        for seg in pattern.split("/"):
+            if seg and not (seg == "**" == segments[-1]):
+                segments.append(seg)
+        name_only = len(segments) == 2
+        # Hidden directories are only worth entering for a dot segment
+        # that has to match something inside them
+        enter_hidden = any(seg[0] == "." for seg in segments[:-1])
+        matches = []
+        # (directory, its path components relative to base)
+        stack: list[tuple[str, tuple[str, ...]]] = [(str(base), ())]
+        while stack:
+            root, rel_root = stack.pop()
+            try:
+                it = os.scandir(root)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    name = entry.name
+                    hidden = name[0] == "."
+                    rel = rel_root + (name,)
+                    # Linked directories are listed but, like os.walk, not
+                    # descended into
+                    if entry.is_dir():
+                        if name in _IGNORED_DIRS:
+                            continue
+                        if not entry.is_symlink() and (enter_hidden or not hidden):
+                            stack.append((entry.path, rel))
+                    if name_only:
+                        if hidden and segments[1][0] != ".":
+                            continue
+                        if not fnmatch.fnmatch(name, segments[1]):
+                            continue
+                    elif not _match_segments(rel, segments):
+                        continue
+                    # Only a symlink can point outside the workspace
+                    if entry.is_symlink() and not self._in_workspace(
+                        os.path.realpath(entry.path)
+                    ):
+                        continue
+                    matches.append(entry.path)
+        matches.sort()
+        return matches
+
     async def _grep_search(self, params: dict) -> str:
         """Search text inside files (grep alternative)."""
         query = params.get("query", "")
@@ -245,40 +338,7 @@ class ToolExecutor:
         if not base.exists():
             return f"❌ Path not found: {base}"
 
-        results = []
-        search_files = []
-
-        if base.is_file():
-            search_files = [base]
-        else:
-            # Recursive file search (skip binary/hidden)
-            for root, dirs, files in os.walk(str(base)):
-                dirs[:] = [
-                    d for d in dirs
-                    if not d.startswith(".")
-                    and d not in {"node_modules", "__pycache__", ".git", "venv", ".venv"}
-                ]
-                for f in files:
-                    if f.startswith("."):
-                        continue
-                    fp = Path(root) / f
-                    if str(fp.resolve()).startswith(str(self.workspace_dir)):
-                        search_files.append(fp)
-
-        for fp in search_files[:500]:
-            try:
-                content = fp.read_text(encoding="utf-8")
-            except (UnicodeDecodeError, PermissionError):
-                continue
-
-            for i, line in enumerate(content.split("\n"), 1):
-                if query.lower() in line.lower():
-                    rel = os.path.relpath(str(fp), str(self.workspace_dir))
-                    results.append(f"  {rel}:{i}: {line.strip()[:120]}")
-                    if len(results) >= 20:
-                        break
-            if len(results) >= 20:
-                break
+        results = await asyncio.to_thread(self._grep_files, base, query.lower())
 
         if not results:
             return f"🔍 '{query}' not found."
@@ -286,31 +346,109 @@ class ToolExecutor:
         header = f"🔍 '{query}' results ({len(results)} matches)"
         return header + "\n" + "\n".join(results)
 
+    def _grep_files(self, base: Path, needle: str) -> list[str]:
+        """Collect up to 20 matching lines under `base` (runs in a thread)."""
+        if base.is_file():
+            lines = _grep_file(base, needle, 20, _file_cache.peek, size_cap=False)
+            return self._format_grep(base, lines)
+
+        files = list(islice(self._iter_grep_files(str(base)), 500))
+
+        # Files are read in parallel; map() still yields in file order, and
+        # files not yet reached once 20 lines are found are cancelled
+        results: list[str] = []
+        pool = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) * 4),
+            thread_name_prefix="ollacode-grep",
+        )
+        try:
+            scans = pool.map(
+                _grep_file, files, repeat(needle), repeat(20),
+                repeat(_file_cache.peek),
+            )
+            for fp, lines in zip(files, scans):
+                results += self._format_grep(fp, lines)
+                if len(results) >= 20:
+                    break
+        finally:
+            pool.shutdown(cancel_futures=True)
+        return results[:20]
+
+    def _iter_grep_files(self, base: str) -> Iterator[str]:
+        """Yield searchable files under `base` in os.walk (top-down) order.
+
+        Skips hidden entries, ignored directories and binary extensions.
+        DirEntry types come from the directory read itself, so plain files
+        cost no extra syscalls; only symlinks are resolved, to keep them
+        from pointing outside the workspace. Linked directories are not
+        followed.
+        """
+        stack = [base]
+        while stack:
+            subdirs = []
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    name = entry.name
+                    if name[0] == ".":
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in _IGNORED_DIRS:
+                            subdirs.append(entry.path)
+                        continue
+                    if os.path.splitext(name)[1].lower() in _BINARY_EXTENSIONS:
+                        continue
+                    if entry.is_symlink():
+                        path = entry.path
+                        if entry.is_file() and self._in_workspace(os.path.realpath(path)):
+                            yield path
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path
+            stack.extend(reversed(subdirs))
+
+    def _format_grep(self, fp: Path | str, lines: list[tuple[int, str]]) -> list[str]:
+        rel = self._relative(os.fspath(fp))
+        return [f"  {rel}:{i}: {line.strip()[:120]}" for i, line in lines]
+
     async def _run_command(self, params: dict) -> str:
         command = params.get("command", "")
         if not command:
             return "❌ No command provided."
 
         # Block dangerous commands
-        dangerous = ["rm -rf /", "mkfs", "dd if=", ":(){ ", "fork bomb"]
-        for d in dangerous:
-            if d in command.lower():
-                return f"⛔ Dangerous command detected: {command}"
+        if _DANGEROUS_RE.search(command):
+            return f"⛔ Dangerous command detected: {command}"
 
         # Request approval
         description = f"⚙️ Run command: `{command}`"
         if not await self._request_approval("run_command", description):
             return "⏭️ User rejected command execution."
 
+        proc = None
         try:
             proc = await asyncio.create_subprocess_shell(
                 command,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                cwd=str(self.workspace_dir),
+                cwd=self._workspace_str,
+            )
+            # Only the head of each stream is shown; the rest is drained and
+            # dropped so a chatty command doesn't pile up in memory.
+            # 4 bytes per shown char covers any UTF-8 text.
+            (stdout, stdout_cut), (stderr, stderr_cut), _ = await asyncio.wait_for(
+                asyncio.gather(
+                    _read_capped(proc.stdout, 1500 * 4),
+                    _read_capped(proc.stderr, 800 * 4),
+                    proc.wait(),
+                ),
+                timeout=60.0,
             )
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=60.0)
         except asyncio.TimeoutError:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
             return f"⏰ Command timed out (60s): {command}"
         except Exception as e:
             return f"❌ Command failed: {e}"
@@ -321,12 +459,12 @@ class ToolExecutor:
         stderr_text = stderr.decode("utf-8", errors="replace").strip()
 
         if stdout_text:
-            if len(stdout_text) > 1500:
+            if stdout_cut or len(stdout_text) > 1500:
                 stdout_text = stdout_text[:1500] + "\n... (output truncated)"
             result_parts.append(f"```\n{stdout_text}\n```")
 
         if stderr_text:
-            if len(stderr_text) > 800:
+            if stderr_cut or len(stderr_text) > 800:
                 stderr_text = stderr_text[:800] + "\n... (stderr truncated)"
             result_parts.append(f"**stderr:**\n```\n{stderr_text}\n```")
 
@@ -335,17 +473,323 @@ class ToolExecutor:
 
 # ─── Utility functions ────────────────────────────────────────
 
-def _generate_diff(old: str, new: str, filename: str = "") -> str:
-    """Generate a unified diff between two texts."""
+def _match_segments(parts: tuple[str, ...], segments: list[str]) -> bool:
+    """Whether relative path components match glob pattern segments.
+
+    Each segment matches exactly one component, except "**", which spans
+    any number of non-hidden ones. A hidden component only matches a
+    segment that itself starts with ".", as with glob.
+    """
+    if not segments:
+        return not parts
+    seg = segments[0]
+    if seg == "**":
+        rest = segments[1:]
+        for i, part in enumerate(parts):
+            if _match_segments(parts[i:], rest):
+                return True
+            if part[0] == ".":
+                return False
+        return not rest
+    if not parts:
+        return False
+    part = parts[0]
+    if part[0] == "." and seg[0] != ".":
+        return False
+    return fnmatch.fnmatch(part, seg) and _match_segments(parts[1:], segments[1:])
+
+
+def _scan_directory(path: Path) -> tuple[int, list[os.DirEntry]]:
+    """Entry count and visible entries of a directory, directories first.
+
+    DirEntry caches its type (usually from readdir itself), so each entry
+    costs at most one stat, and only files need it for the size.
+    """
+    with os.scandir(path) as it:
+        entries = list(it)
+    visible = [e for e in entries if e.name[0] != "."]
+    visible.sort(key=lambda e: (not e.is_dir(), e.name))
+    return len(entries), visible
+
+
+# Process umask, read once: mkstemp creates files 0600, and new files
+# should get the mode open() would have given them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _write_text(path: Path, text: str) -> None:
+    """Replace a file's contents atomically.
+
+    The text goes to a uniquely named temporary file in the same directory
+    that is then renamed over `path`, so a crash mid-write never leaves a
+    truncated file and concurrent writes to one path don't share a
+    temporary. An existing file's permission bits are kept.
+    """
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)  # as text-mode writes do
+    data = text.encode("utf-8")
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with open(fd, "wb") as f:
+            f.write(data)
+        try:
+            mode = path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _normalize_newlines(text: str) -> str:
+    """Translate CRLF and lone CR line endings to LF, like text-mode reads."""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_text(path: Path | str) -> str:
+    """Read a UTF-8 file with newlines normalised like Path.read_text().
+
+    Decoding the whole file in one call is several times faster than the
+    text-mode reader on large files. The file is read rather than mapped:
+    a mapped file truncated by another process kills the interpreter with
+    SIGBUS.
+    """
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8")
+    return _normalize_newlines(text)
+
+
+class _FileCache:
+    """Decoded texts of recently read files, least recently used first.
+
+    An entry is served only while the file's mtime and size still match,
+    so edits made outside the tools (run_command, an editor) are picked
+    up; the tools' own writes drop the entry. One instance is shared by
+    all executors (the Telegram bot runs one per user), and reads happen
+    from worker threads, hence the lock.
+    """
+
+    def __init__(self, max_chars: int = 64 * 1024 * 1024) -> None:
+        self._entries: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+        self._chars = 0
+        self._max_chars = max_chars
+        self._lock = threading.Lock()
+
+    def read(self, path: Path | str) -> str:
+        """Like _read_text(), from the cache when the file is unchanged."""
+        key = str(path)
+        st = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+                self._entries.move_to_end(key)
+                return entry[2]
+
+        text = _read_text(key)
+        if len(text) > self._max_chars:
+            return text
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (st.st_mtime_ns, st.st_size, text)
+            self._chars += len(text)
+            while self._chars > self._max_chars:
+                self._pop(next(iter(self._entries)))
+        return text
+
+    def peek(self, path: Path | str) -> str:
+        """Like read(), but a miss isn't stored and a hit isn't refreshed.
+
+        For bulk reads (grep), which would otherwise evict the files
+        actually being worked on.
+        """
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            st = os.stat(key)
+            if entry[:2] == (st.st_mtime_ns, st.st_size):
+                return entry[2]
+        return _read_text(key)
+
+    def discard(self, path: Path | str) -> None:
+        """Forget a file's cached text (after writing it)."""
+        with self._lock:
+            self._pop(str(path))
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._chars -= len(entry[2])
+
+
+# Decoded texts of recently read files (grep → read → edit → read)
+_file_cache = _FileCache()
+
+
+# read_file decodes only the requested lines of files at least this big
+_HEAD_READ_MIN_BYTES = 1024 * 1024
+
+
+def _read_head(
+    path: Path, lines: int, read: Callable[[Path], str] = _read_text
+) -> tuple[str, int]:
+    """Text covering at least the first `lines` lines, and the line count.
+
+    Smaller files are read whole with `read`. Large files are scanned in
+    binary chunks to count lines and only the needed head is decoded, so
+    memory and decode work don't scale with the file.
+    """
+    if os.stat(path).st_size < _HEAD_READ_MIN_BYTES:
+        text = read(path)
+        return text, text.count("\n") + 1
+    with open(path, "rb") as f:
+        head = bytearray()
+        newlines = 0
+        while chunk := f.read(1024 * 1024):
+            if newlines < lines:
+                head += chunk
+            newlines += chunk.count(b"\n")
+
+    cut = -1
+    for _ in range(max(lines, 0)):
+        cut = head.find(b"\n", cut + 1)
+        if cut == -1:
+            break
+    if cut != -1:
+        del head[cut:]
+    return _normalize_newlines(head.decode("utf-8")), newlines + 1
+
+
+async def _read_capped(stream: asyncio.StreamReader, limit: int) -> tuple[bytes, bool]:
+    """Read a stream to EOF, keeping at most `limit` bytes.
+
+    Returns the kept bytes and whether anything was dropped.
+    """
+    buf = bytearray()
+    dropped = False
+    while chunk := await stream.read(65536):
+        room = limit - len(buf)
+        if room > 0:
+            buf += chunk[:room]
+        if len(chunk) > room:
+            dropped = True
+    return bytes(buf), dropped
+
+
+def _grep_file(
+    fp: Path | str,
+    needle: str,
+    limit: int,
+    read: Callable[[Path | str], str] = _read_text,
+    size_cap: bool = True,
+) -> list[tuple[int, str]]:
+    """Up to `limit` (line number, line) matches in one file.
+
+    Unreadable, non-UTF-8 and (with `size_cap`) oversized files yield none.
+    """
+    try:
+        if size_cap and os.stat(fp).st_size > _GREP_MAX_FILE_BYTES:
+            return []
+        content = read(fp)
+    except (UnicodeDecodeError, OSError):
+        return []
+    return list(islice(_iter_matching_lines(content, needle), limit))
+
+
+def _iter_matching_lines(content: str, needle: str) -> Iterator[tuple[int, str]]:
+    """Yield (line number, line) for lines containing lowercase `needle`.
+
+    Searches the whole text at once and slices out only the matching
+    lines, so files without a match are never split into lines.
+    """
+    if "\n" in needle:
+        return
+    lowered = content.lower()
+    if len(lowered) != len(content):
+        # Case folding changed some lengths, so offsets don't line up
+        for i, line in enumerate(content.split("\n"), 1):
+            if needle in line.lower():
+                yield i, line
+        return
+
+    lineno, line_start = 1, 0
+    pos = lowered.find(needle)
+    while pos != -1:
+        lineno += lowered.count("\n", line_start, pos)
+        line_start = lowered.rfind("\n", 0, pos) + 1
+        line_end = lowered.find("\n", pos)
+        if line_end == -1:
+            line_end = len(content)
+        yield lineno, content[line_start:line_end]
+        pos = lowered.find(needle, line_end)
+
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(.*?) \+(\d+)(.*)$", re.DOTALL)
+
+# Diffs of texts at least this long are computed in a worker thread
+_DIFF_THREAD_MIN_CHARS = 50_000
+
+
+async def _generate_diff_async(old: str, new: str, filename: str = "") -> str:
+    """_generate_diff(), off the event loop when either side is large."""
+    if max(len(old), len(new)) < _DIFF_THREAD_MIN_CHARS:
+        return _generate_diff(old, new, filename)
+    return await asyncio.to_thread(_generate_diff, old, new, filename)
+
+
+def _generate_diff(old: str, new: str, filename: str = "", context: int = 3) -> str:
+    """Generate a unified diff between two texts.
+
+    Identical leading/trailing lines (beyond the context kept around the
+    change) are cut off before diffing, so a small edit to a large file
+    only diffs the changed region. Hunk line numbers are shifted back.
+    """
     old_lines = old.splitlines(keepends=True)
     new_lines = new.splitlines(keepends=True)
+
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and old_lines[-1 - suffix] == new_lines[-1 - suffix]
+    ):
+        suffix += 1
+    head = max(0, prefix - context)
+    tail = max(0, suffix - context)
+
     diff = difflib.unified_diff(
-        old_lines, new_lines,
+        old_lines[head:len(old_lines) - tail],
+        new_lines[head:len(new_lines) - tail],
         fromfile=f"a/{filename}",
         tofile=f"b/{filename}",
-        n=3,
+        n=context,
     )
-    diff_str = "".join(diff)
+    # Stop formatting once past the display cap
+    parts: list[str] = []
+    size = 0
+    for line in diff:
+        if head and line.startswith("@@"):
+            m = _HUNK_RE.match(line)
+            line = (
+                f"@@ -{int(m.group(1)) + head}{m.group(2)}"
+                f" +{int(m.group(3)) + head}{m.group(4)}"
+            )
+        parts.append(line)
+        size += len(line)
+        if size > 1000:
+            break
+    diff_str = "".join(parts)
     if not diff_str:
         return "(no changes)"
     if len(diff_str) > 1000:
@@ -353,6 +797,53 @@ def _generate_diff(old: str, new: str, filename: str = "") -> str:
     return f"```diff\n{diff_str}\n```"
 
 
+def _iter_tool_blocks(text: str) -> Iterator[tuple[int, int, str]]:
+    """Yield (start, end, body) for each ```tool block in `text`.
+
+    Matches what r"```tool\\s*\\n(.+?)\\n```" (DOTALL) would, but with
+    str.find: the regex rescans to the end of the text for every opener
+    that has no closing fence, which is quadratic on long output.
+    """
+    pos = 0
+    while (start := text.find("```tool", pos)) != -1:
+        # The body starts after the last newline of the whitespace run
+        ws_end = start + 7
+        while ws_end < len(text) and text[ws_end].isspace():
+            ws_end += 1
+        nl = text.rfind("\n", start + 7, ws_end)
+        if nl == -1:
+            pos = start + 1
+            continue
+        # Non-empty body, then a newline and the closing fence; with no
+        # closing fence here there is none for any later opener either
+        close = text.find("\n```", nl + 2)
+        if close == -1:
+            # Except a fence right after the whitespace run: the regex
+            # then backtracks to an earlier newline, so the body is the
+            # whitespace between them
+            prev = text.rfind("\n", start + 7, nl - 1)
+            if prev == -1 or not text.startswith("```", nl + 1):
+                return
+            yield start, nl + 4, text[prev + 1:nl]
+            pos = nl + 4
+            continue
+        yield start, close + 4, text[nl + 1:close]
+        pos = close + 4
+
+
+def strip_tool_blocks(text: str) -> str:
+    """Remove all ```tool blocks from `text` (e.g. for display)."""
+    if "```tool" not in text:
+        return text
+    parts: list[str] = []
+    pos = 0
+    for start, end, _ in _iter_tool_blocks(text):
+        parts.append(text[pos:start])
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
 def parse_tool_calls(text: str) -> list[dict]:
     """Parse tool call blocks from LLM response.
 
@@ -360,13 +851,50 @@ def parse_tool_calls(text: str) -> list[dict]:
     {"tool": "read_file", "path": "some/file.py"}
     ```
     """
-    tool_blocks = re.findall(r"```tool\s*\n(.+?)\n```", text, re.DOTALL)
+    # Most responses contain no tool call; a substring check is far cheaper
+    if "```tool" not in text:
+        return []
     calls = []
-    for block in tool_blocks:
+    for _, _, block in _iter_tool_blocks(text):
         try:
-            data = json.loads(block.strip())
+            data = json.loads(block)
             if isinstance(data, dict) and "tool" in data:
                 calls.append(data)
         except json.JSONDecodeError:
             continue
     return calls
+
+
+def elide_tool_call_args(text: str, max_chars: int = 200) -> str:
+    """Shorten long string arguments inside tool call blocks.
+
+    Applied to an assistant message once its tool calls have run, so file
+    contents passed to write_file/edit_file are not re-sent with every
+    later request. Returns `text` itself when nothing was shortened.
+    """
+    if "```tool" not in text:
+        return text
+
+    parts: list[str] = []
+    pos = 0
+    for start, end, block in _iter_tool_blocks(text):
+        try:
+            data = json.loads(block)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        long_keys = [
+            key for key, value in data.items()
+            if isinstance(value, str) and len(value) > max_chars
+        ]
+        if not long_keys:
+            continue
+        for key in long_keys:
+            data[key] = f"[{len(data[key])} chars omitted]"
+        parts += (text[pos:start], f"```tool\n{json.dumps(data, ensure_ascii=False)}\n```")
+        pos = end
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
@@ -0,0 +1,28 @@
+"""Tests for ollacode.telegram_bot."""
+
+from __future__ import annotations
+
+import unittest
+
+from ollacode.telegram_bot import _escape_html
+
+
+class EscapeHtmlTest(unittest.TestCase):
+    def test_fenced_block_and_inline_code(self) -> None:
+        self.assertEqual(
+            _escape_html("Run `make` then:\n```sh\necho <hi>\n```"),
+            "Run <code>make</code> then:\n"
+            '<pre><code class="language-sh">echo &lt;hi&gt;\n</code></pre>',
+        )
+
+    def test_stray_backtick_does_not_pair_with_fence(self) -> None:
+        text = "Wrap names in a backtick (`) like so:\n```python\nx = 1\n```"
+        self.assertEqual(
+            _escape_html(text),
+            "Wrap names in a backtick (`) like so:\n"
+            '<pre><code class="language-python">x = 1\n</code></pre>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
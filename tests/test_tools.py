@@ -0,0 +1,121 @@
+"""Tests for ollacode.tools."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from ollacode.tools import ToolExecutor, _file_cache, _write_text, strip_tool_blocks
+
+
+class SearchFilesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name).resolve()
+        for rel in (
+            ".env",
+            ".gitignore",
+            "README.md",
+            "src/a.py",
+            "src/.hidden.py",
+            "src/deep/b.py",
+            ".github/workflows/ci.yml",
+            "node_modules/pkg/index.py",
+        ):
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x\n")
+        self.tools = ToolExecutor(self.root)
+
+    def find(self, pattern: str) -> list[str]:
+        matches = self.tools._find_files(self.root, pattern)
+        return [os.path.relpath(m, self.root).replace(os.sep, "/") for m in matches]
+
+    def test_dotfile_pattern_finds_dotfiles(self) -> None:
+        self.assertEqual(self.find(".env"), [".env"])
+        self.assertEqual(self.find(".gitignore"), [".gitignore"])
+
+    def test_wildcard_skips_hidden_entries(self) -> None:
+        self.assertEqual(self.find("*.py"), ["src/a.py", "src/deep/b.py"])
+        self.assertEqual(self.find("src/.*.py"), ["src/.hidden.py"])
+
+    def test_path_pattern_matches_one_level_per_segment(self) -> None:
+        self.assertEqual(self.find("src/*.py"), ["src/a.py"])
+        self.assertEqual(self.find("src/**/*.py"), ["src/a.py", "src/deep/b.py"])
+
+    def test_dot_segment_enters_hidden_directory(self) -> None:
+        self.assertEqual(
+            self.find(".github/*/*.yml"), [".github/workflows/ci.yml"]
+        )
+
+    def test_search_files_output(self) -> None:
+        result = asyncio.run(
+            self.tools.execute("search_files", {"pattern": ".env"})
+        )
+        self.assertIn("📄 .env", result)
+
+
+class FileCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name).resolve()
+        self.path = self.root / "a.txt"
+        self.path.write_text("alpha\nbeta\n")
+        self.tools = ToolExecutor(self.root)
+        self.addCleanup(_file_cache.discard, self.path)
+
+    def run_tool(self, name: str, params: dict) -> str:
+        return asyncio.run(self.tools.execute(name, params))
+
+    def test_grep_does_not_fill_cache(self) -> None:
+        self.assertIn("a.txt:2: beta", self.run_tool("grep_search", {"query": "beta"}))
+        self.assertNotIn(str(self.path), _file_cache._entries)
+
+    def test_reads_see_edits(self) -> None:
+        self.run_tool("read_file", {"path": "a.txt"})
+        self.assertIn(str(self.path), _file_cache._entries)
+        self.run_tool("edit_file", {"path": "a.txt", "search": "beta", "replace": "gamma"})
+        self.assertIn("2 | gamma", self.run_tool("read_file", {"path": "a.txt"}))
+        self.path.write_text("changed outside\n")
+        self.assertIn("1 | changed outside", self.run_tool("read_file", {"path": "a.txt"}))
+
+
+class WriteTextTest(unittest.TestCase):
+    def test_concurrent_writes_to_one_path(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "f.txt"
+            errors: list[BaseException] = []
+
+            def write(text: str) -> None:
+                try:
+                    _write_text(path, text)
+                except BaseException as e:
+                    errors.append(e)
+
+            for _ in range(50):
+                threads = [
+                    threading.Thread(target=write, args=(c * 1000,)) for c in "ab"
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                self.assertIn(path.read_text(), ("a" * 1000, "b" * 1000))
+            self.assertEqual(errors, [])
+            self.assertEqual(os.listdir(tmp), ["f.txt"])
+
+
+class ToolBlocksTest(unittest.TestCase):
+    def test_strip_whitespace_only_block(self) -> None:
+        self.assertEqual(strip_tool_blocks("a```tool\n\n\n```b"), "ab")
+        self.assertEqual(strip_tool_blocks("a```tool\n```b"), "a```tool\n```b")
+
+
+if __name__ == "__main__":
+    unittest.main()